@@ -0,0 +1,105 @@
+import os
+import json
+import re
+import sqlite3
+import time
+
+# Full-text index built by confluenceToDatabase.py (bundled with the function, or on a mounted file system)
+INDEX_PATH = os.getenv("CONFLUENCE_SEARCH_INDEX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "confluence_search.db"))
+WIKI_URL = os.getenv("CONFLUENCE_WIKI_URL", "")  # e.g. https://your-confluence-instance.atlassian.net/wiki
+MAX_LIMIT = 50
+SNIPPET_TOKENS = 24
+
+SEARCH_SQL = """
+SELECT d.content_id, d.title, d.space, d.type, d.webui, d.last_modified,
+       snippet(documents_fts, 1, '**', '**', '...', {tokens}) AS snippet, rank
+FROM documents_fts JOIN documents AS d ON d.rowid = documents_fts.rowid
+WHERE documents_fts MATCH ? {filters}
+ORDER BY rank
+LIMIT ?
+"""
+
+# Opened once per container, so warm invocations reuse the connection
+_connection = None
+
+def get_connection():
+    global _connection
+    if _connection is None:
+        # Read-only: nothing is written to the index, and no journal is needed
+        _connection = sqlite3.connect(f"file:{INDEX_PATH}?mode=ro", uri=True, check_same_thread=False)
+    return _connection
+
+def build_match(query, operator):
+    """
+    Turns free text into an FTS5 query: each word is quoted (so punctuation
+    and FTS keywords are taken literally) and the words are joined with AND or OR.
+    """
+    words = re.findall(r"\w+", query)
+    return f" {operator} ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+def search(query, space=None, content_type=None, limit=10):
+    filters = ""
+    extra = []
+    if space:
+        filters += " AND d.space = ?"
+        extra.append(space)
+    if content_type:
+        filters += " AND d.type = ?"
+        extra.append(content_type)
+    sql = SEARCH_SQL.format(tokens=SNIPPET_TOKENS, filters=filters)
+
+    connection = get_connection()
+    rows = []
+    # Pages containing every word first; if there are none, pages containing any of them
+    for operator in ("AND", "OR"):
+        match = build_match(query, operator)
+        if not match:
+            break
+        rows = connection.execute(sql, [match] + extra + [limit]).fetchall()
+        if rows:
+            break
+    return [
+        {
+            "id": content_id,
+            "title": title,
+            "space": space_key,
+            "type": kind,
+            "url": f"{WIKI_URL}{webui}" if webui else None,
+            "last_modified": last_modified,
+            "snippet": snippet,
+            "score": round(-rank, 3),
+        }
+        for content_id, title, space_key, kind, webui, last_modified, snippet, rank in rows
+    ]
+
+def lambda_handler(event, context):
+    # Retrieve query parameters
+    params = event.get("queryStringParameters", {}) or {}
+    query = (params.get("q") or "").strip()
+    space = params.get("space")  # e.g., "SPACE1"
+    content_type = params.get("type")  # "page" or "blogpost"
+    try:
+        limit = max(1, min(int(params.get("limit", 10)), MAX_LIMIT))
+    except ValueError:
+        limit = 10
+
+    if not query:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Missing required query parameter 'q'"})
+        }
+
+    start = time.perf_counter()
+    try:
+        results = search(query, space, content_type, limit)
+    except sqlite3.Error as e:
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": f"Failed to search Confluence: {str(e)}"})
+        }
+
+    print(f"Query {query!r}: {len(results)} result(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return {
+        "statusCode": 200,
+        "body": json.dumps(results)
+    }
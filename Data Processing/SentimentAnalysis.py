@@ -5,25 +5,39 @@ This script reads text feedback from a CSV file, uses a pre-trained sentiment
 analysis model (from the "textblob" library), and outputs sentiment scores and
 labels to a new CSV file.
 
+Large files are scored in batches: the feedback column is split into chunks
+that are scored in parallel worker processes, each distinct text only once,
+and the results are collected into a float column and a categorical label
+column. The scores and labels are identical to scoring row by row.
+
 Dependencies:
-    pip install pandas textblob
+    pip install pandas numpy textblob
 
 Usage:
     1. Create a CSV file called 'feedback.csv' with a column named "Feedback".
     2. Run this script to generate an output file 'feedback_with_sentiment.csv'.
+       Options: python SentimentAnalysis.py --input surveys.csv --output scored.csv --workers 8
     3. You can further use these sentiment scores to filter or group responses.
 """
 
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 from textblob import TextBlob
 
+SENTIMENT_LABELS = ["Negative", "Neutral", "Positive"]  # Indexed by sign(polarity) + 1
+DEFAULT_CHUNKSIZE = 20_000  # Texts per batch sent to a worker process
+
 def analyze_sentiment(text):
     """
     Uses TextBlob to analyze the sentiment of the given text.
-    
+
     Args:
         text (str): The feedback text to analyze.
-        
+
     Returns:
         dict: A dictionary containing polarity and a sentiment label (Positive, Negative, or Neutral).
     """
@@ -39,26 +53,101 @@ def analyze_sentiment(text):
 
     return {"polarity": polarity, "label": sentiment_label}
 
-def main():
-    try:
-        df = pd.read_csv("feedback.csv")
-    except FileNotFoundError:
-        print("Could not find 'feedback.csv'. Please create a CSV file with a column named 'Feedback'.")
-        return
-
+def add_sentiment_loop(df, column="Feedback"):
+    """
+    Row-by-row scoring: adds Polarity and SentimentLabel columns to `df` in place.
+    Kept as the reference the batched path is checked against.
+    """
     # Create new columns for polarity and sentiment label
     df["Polarity"] = None
     df["SentimentLabel"] = None
 
     for idx, row in df.iterrows():
-        text = str(row["Feedback"])  # Convert to str to avoid errors if there's any non-string data
+        text = str(row[column])  # Convert to str to avoid errors if there's any non-string data
         result = analyze_sentiment(text)
         df.at[idx, "Polarity"] = result["polarity"]
         df.at[idx, "SentimentLabel"] = result["label"]
+    return df
+
+def score_chunk(texts):
+    """
+    Polarity of each text, as a float array. Runs in the worker processes.
+
+    Calls the analyzer TextBlob uses for `.sentiment` directly, which skips
+    building a TextBlob (and its tokenizers) per text; the scores are the same.
+    """
+    analyze = TextBlob.analyzer.analyze
+    return np.fromiter((analyze(text).polarity for text in texts), dtype=np.float64, count=len(texts))
+
+def score_polarity(texts, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Polarity of each text, scored in batches across worker processes.
+
+    Each distinct text is scored once. Inputs small enough for a single
+    chunk (or workers=1) are scored in this process.
+
+    Args:
+        texts (list): Feedback strings.
+        workers (int, optional): Worker processes. Defaults to the number of CPUs.
+        chunksize (int): Texts per batch.
+
+    Returns:
+        numpy.ndarray: float64 polarity per text, in input order.
+    """
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=False)
+    uniques = list(uniques)
+    scores = np.empty(len(uniques), dtype=np.float64)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(uniques) <= chunksize:
+        scores[:] = score_chunk(uniques)
+    else:
+        starts = range(0, len(uniques), chunksize)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = executor.map(score_chunk, (uniques[start:start + chunksize] for start in starts))
+            for start, chunk in zip(starts, chunks):
+                scores[start:start + len(chunk)] = chunk
+    return scores[codes]
+
+def sentiment_labels(polarity):
+    """
+    Positive / Neutral / Negative label for each polarity, as a categorical.
+    """
+    codes = (np.sign(polarity) + 1).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=SENTIMENT_LABELS)
+
+def add_sentiment(df, column="Feedback", workers=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Batched scoring: adds a float Polarity column and a categorical
+    SentimentLabel column to `df` in place, with the same values as
+    add_sentiment_loop.
+    """
+    texts = [str(value) for value in df[column].tolist()]  # Same str() conversion as the row-by-row loop
+    polarity = score_polarity(texts, workers, chunksize)
+    df["Polarity"] = polarity
+    df["SentimentLabel"] = sentiment_labels(polarity)
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Add sentiment scores and labels to a CSV of feedback.")
+    parser.add_argument("--input", default="feedback.csv", help="CSV file with the feedback")
+    parser.add_argument("--output", default="feedback_with_sentiment.csv", help="CSV file to write")
+    parser.add_argument("--column", default="Feedback", help="Column holding the feedback text")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: number of CPUs)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Texts per batch")
+    args = parser.parse_args()
+
+    try:
+        df = pd.read_csv(args.input)
+    except FileNotFoundError:
+        print(f"Could not find '{args.input}'. Please create a CSV file with a column named '{args.column}'.")
+        return
+
+    add_sentiment(df, args.column, args.workers, args.chunksize)
 
     # Save the updated DataFrame to a new CSV
-    df.to_csv("feedback_with_sentiment.csv", index=False)
-    print("Sentiment analysis complete. Results stored in 'feedback_with_sentiment.csv'.")
+    df.to_csv(args.output, index=False)
+    print(f"Sentiment analysis complete. Results stored in '{args.output}'.")
 
 if __name__ == "__main__":
     main()
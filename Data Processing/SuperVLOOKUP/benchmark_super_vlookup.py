@@ -0,0 +1,259 @@
+"""
+Benchmark Suite for super_vlookup
+---------------------------------
+Generates seeded synthetic main/lookup tables with realistic company-name
+typos and repeated keys, runs exact and fuzzy joins for every join type, and
+records wall time, peak memory (RSS) and match recall/precision for each case.
+Results are written to a JSON file so runs before and after a change can be
+compared.
+
+Each case runs in a fresh process so its peak RSS is not inflated by earlier
+cases.
+
+Dependencies:
+    pip install pandas rapidfuzz numpy
+
+Usage:
+    python benchmark_super_vlookup.py                          # 10k, 100k and 1M rows
+    python benchmark_super_vlookup.py --sizes 10000,100000 --output before.json
+    python benchmark_super_vlookup.py --sizes 10000,100000 --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import rapidfuzz
+
+from superVLOOKUP import super_vlookup
+
+JOIN_TYPES = ['left', 'right', 'outer', 'inner']
+MODES = ['exact', 'fuzzy']
+
+NAME_PARTS = [
+    "Acme", "Global", "Blue", "River", "North", "Summit", "Pioneer", "Apex", "Vertex", "Harbor",
+    "Silver", "Green", "Red", "Oak", "Pine", "Stone", "Bright", "Quantum", "Nova", "Atlas",
+    "Eagle", "Falcon", "Liberty", "Union", "Metro", "Prime", "Evergreen", "Crescent", "Sterling", "Beacon",
+]
+INDUSTRIES = [
+    "Systems", "Logistics", "Foods", "Capital", "Health", "Energy", "Media", "Labs", "Partners", "Motors",
+    "Software", "Holdings", "Analytics", "Consulting", "Robotics", "Textiles", "Pharma", "Networks",
+]
+SUFFIXES = ["Inc", "Inc.", "LLC", "Ltd", "Corp", "Corporation", "Co", "Group", "GmbH", "PLC"]
+KEYBOARD_NEIGHBOURS = {
+    'a': 'qsz', 'e': 'wrd', 'i': 'uok', 'o': 'ipl', 'n': 'bm', 'r': 'etf', 's': 'adw', 't': 'ryg', 'l': 'kop',
+}
+
+def company_name(rng, num_parts=None):
+    parts = rng.sample(NAME_PARTS, num_parts or rng.choice([1, 1, 2]))
+    return f"{' '.join(parts)} {rng.choice(INDUSTRIES)} {rng.choice(SUFFIXES)}"
+
+def add_typo(name, rng):
+    """
+    Applies one realistic data-entry error to a company name.
+    """
+    i = rng.randrange(1, len(name) - 1)
+    kind = rng.choice(['drop', 'double', 'swap', 'neighbour', 'case', 'punctuation', 'suffix'])
+    if kind == 'drop':
+        return name[:i] + name[i + 1:]
+    if kind == 'double':
+        return name[:i] + name[i] + name[i:]
+    if kind == 'swap':
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if kind == 'neighbour':
+        char = name[i].lower()
+        return name[:i] + rng.choice(KEYBOARD_NEIGHBOURS.get(char, 'e')) + name[i + 1:]
+    if kind == 'case':
+        return name.upper() if rng.random() < 0.5 else name.lower()
+    if kind == 'punctuation':
+        return name.rstrip('.') if name.endswith('.') else name + '.'
+    words = name.split()
+    return ' '.join(words[:-1] + [rng.choice(SUFFIXES)])
+
+def generate_tables(num_rows, seed=42, typo_rate=0.1, duplicate_rate=0.6, orphan_rate=0.05):
+    """
+    Builds (main_df, lookup_df).
+
+    The lookup table has one row per distinct company. The main table has
+    `num_rows` rows; `duplicate_rate` of them repeat a company already used,
+    `typo_rate` carry a misspelt key and `orphan_rate` use a company that is
+    not in the lookup table. The main table keeps the true key in
+    'True Company' for measuring recall.
+    """
+    rng = random.Random(seed)
+    num_companies = max(10, int(num_rows * (1 - duplicate_rate)))
+    companies = list(dict.fromkeys(company_name(rng) for _ in range(num_companies * 2)))[:num_companies]
+    if len(companies) < num_companies:
+        # One- and two-part names run out at about 162k distinct companies; three-part names cover the rest
+        seen = set(companies)
+        while len(companies) < num_companies:
+            name = company_name(rng, num_parts=3)
+            if name not in seen:
+                seen.add(name)
+                companies.append(name)
+    num_orphans = max(1, int(len(companies) * orphan_rate))
+    lookup_companies = companies[num_orphans:]
+
+    lookup_df = pd.DataFrame({
+        'Company': lookup_companies,
+        'Account Owner': [f"Rep {rng.randrange(200)}" for _ in lookup_companies],
+        'Region': [rng.choice(['AMER', 'EMEA', 'APAC']) for _ in lookup_companies],
+        'Tier': [rng.randrange(1, 5) for _ in lookup_companies],
+    })
+
+    true_keys = [rng.choice(companies) for _ in range(num_rows)]
+    keys = [add_typo(k, rng) if rng.random() < typo_rate else k for k in true_keys]
+    main_df = pd.DataFrame({
+        'Company': keys,
+        'True Company': true_keys,
+        'Amount': [round(rng.uniform(10, 10_000), 2) for _ in range(num_rows)],
+        'Order ID': range(num_rows),
+    })
+    return main_df, lookup_df
+
+def run_case(data_path, mode, join_type, threshold, result_queue):
+    """
+    Runs one join in this (fresh) process and reports timing, memory and recall.
+    """
+    main_df, lookup_df = pd.read_pickle(data_path)
+    lookup_keys = set(lookup_df['Company'])
+
+    start = time.perf_counter()
+    merged = super_vlookup(main_df, lookup_df, ['Company'], join_type=join_type,
+                           soft_match=(mode == 'fuzzy'), threshold=threshold)
+    seconds = time.perf_counter() - start
+
+    # super_vlookup rewrites the main table's key column with the matched keys
+    resolvable = main_df['True Company'].isin(lookup_keys)
+    matched = main_df['Company'].isin(lookup_keys)
+    correct = matched & (main_df['Company'] == main_df['True Company'])
+    recall = correct.sum() / max(resolvable.sum(), 1)
+    precision = correct.sum() / max(matched.sum(), 1)
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+    result_queue.put({
+        'seconds': round(seconds, 4),
+        'rows_per_second': round(len(main_df) / seconds) if seconds else None,
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'rows_out': len(merged),
+        'recall': round(float(recall), 4),
+        'precision': round(float(precision), 4),
+    })
+
+def wait_for_result(process, result_queue, timeout):
+    """
+    Waits for a case's result. Returns {'error': ...} instead if the process
+    dies without reporting (e.g. killed for running out of memory) or runs
+    longer than `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = result_queue.get(timeout=1)
+            process.join()
+            return result
+        except queue.Empty:
+            if not process.is_alive():
+                process.join()
+                return {'error': f"process exited with code {process.exitcode} without a result"}
+            if time.monotonic() > deadline:
+                process.terminate()
+                process.join()
+                return {'error': f"timed out after {timeout}s"}
+
+def compare(results, previous_path):
+    """
+    Prints the speed-up of each case against an earlier results file.
+    """
+    with open(previous_path) as f:
+        previous = {
+            (r['rows'], r['mode'], r['join_type']): r for r in json.load(f)['results']
+        }
+    print(f"\nComparison with {previous_path}:")
+    for r in results:
+        old = previous.get((r['rows'], r['mode'], r['join_type']))
+        if old and 'error' not in old and 'error' not in r:
+            print(f"  {r['rows']:>9,} {r['mode']:<6} {r['join_type']:<6} "
+                  f"speed-up x{old['seconds'] / r['seconds']:.2f}, "
+                  f"RSS {old['peak_rss_mb']:.0f} -> {r['peak_rss_mb']:.0f} MB, "
+                  f"recall {old['recall']:.3f} -> {r['recall']:.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark super_vlookup on synthetic data.")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Main-table row counts, comma-separated")
+    parser.add_argument("--modes", default=",".join(MODES), help="exact and/or fuzzy")
+    parser.add_argument("--joins", default=",".join(JOIN_TYPES), help="Join types to run")
+    parser.add_argument("--threshold", type=int, default=90, help="Fuzzy match threshold")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the generator")
+    parser.add_argument("--typo-rate", type=float, default=0.1, help="Share of main-table keys with a typo")
+    parser.add_argument("--duplicate-rate", type=float, default=0.6, help="Share of rows repeating a key")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--case-timeout", type=float, default=3600, help="Seconds before a case is abandoned")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    modes = [m.strip() for m in args.modes.split(',')]
+    joins = [j.strip() for j in args.joins.split(',')]
+    context = multiprocessing.get_context('spawn')
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            main_df, lookup_df = generate_tables(size, args.seed, args.typo_rate, args.duplicate_rate)
+            data_path = os.path.join(tmp_dir, f"data_{size}.pkl")
+            pd.to_pickle((main_df, lookup_df), data_path)
+            for mode in modes:
+                for join_type in joins:
+                    result_queue = context.Queue()
+                    process = context.Process(
+                        target=run_case, args=(data_path, mode, join_type, args.threshold, result_queue)
+                    )
+                    process.start()
+                    result = wait_for_result(process, result_queue, args.case_timeout)
+                    result.update({'rows': size, 'lookup_rows': len(lookup_df),
+                                   'mode': mode, 'join_type': join_type})
+                    results.append(result)
+                    if 'error' in result:
+                        print(f"{size:>9,} rows  {mode:<6} {join_type:<6} FAILED: {result['error']}")
+                        continue
+                    print(f"{size:>9,} rows  {mode:<6} {join_type:<6} {result['seconds']:>9.3f}s  "
+                          f"{result['peak_rss_mb']:>8.1f} MB  recall {result['recall']:.3f}  "
+                          f"precision {result['precision']:.3f}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'rapidfuzz': rapidfuzz.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'threshold': args.threshold,
+            'typo_rate': args.typo_rate,
+            'duplicate_rate': args.duplicate_rate,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+"""
+Resident Lookup Server for super_vlookup
+----------------------------------------
+Keeps lookup tables loaded in memory between VLOOKUPs. The server parses a
+lookup table once, builds an index over its key columns (a LookupIndex:
+factorized key codes, where missing values match as in pd.merge) and a fuzzy
+(block) index over its first key column, and then answers batch join
+requests from clients over a local Unix socket (or a localhost TCP port where
+Unix sockets are not available). Left and inner joins probe the key index;
+right and outer joins, which keep every lookup row, run pd.merge.
+
+Before each request the server checks the lookup file's size and
+modification time. If they changed, it hashes the file and reloads the table
+and its indexes only when the contents really changed. Fuzzy matches are
+remembered per table version (up to --max-cached-matches per table, least
+recently used dropped first), so repeated keys are not scored twice.
+
+Tables and rows travel as Arrow IPC streams, so pyarrow is required.
+
+Security: the server reads lookup files on behalf of its clients, with the
+permissions of the user running it. It only reads table files (.csv, .xlsx,
+.parquet, .feather, .arrow) under the directories given with --allow-dir
+(default: the directory it was started in). The Unix socket is only
+accessible to the user running the server. In TCP mode (--port) any local
+user can connect, so every request must carry the token the server writes
+to ~/.super_vlookup.token (readable by its owner only); clients read it
+from there automatically.
+
+Dependencies:
+    pip install pandas rapidfuzz numpy pyarrow
+
+Usage:
+    # Start the server (optionally preloading a table and its key columns)
+    python lookup_server.py serve --preload accounts.xlsx:Account --allow-dir ~/lookups
+
+    # Join a main table against the resident lookup table
+    python lookup_server.py query orders.csv accounts.xlsx -k Account -c Owner,Region -o merged.csv
+
+    # Show which tables are loaded
+    python lookup_server.py status
+"""
+
+import argparse
+from collections import OrderedDict
+import hashlib
+import json
+import hmac
+import os
+import secrets
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from superVLOOKUP import (
+    TABLE_FILE_TYPES, LookupIndex, _block_index, _cache_token, _split_list, composite_choice_index,
+    fuzzy_match_keys, match_composite_keys, read_table, write_table
+)
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".super_vlookup.sock")
+DEFAULT_TOKEN_PATH = os.path.join(os.path.expanduser("~"), ".super_vlookup.token")  # TCP mode only
+HASH_BLOCK_SIZE = 1 << 20
+BLOCK_WIDTH = 2
+MAX_CACHED_MATCHES = 1_000_000  # Remembered fuzzy matches per table
+
+# Message framing: 4-byte header length + JSON header, 8-byte payload length + Arrow IPC payload
+HEADER_LENGTH = struct.Struct("!I")
+PAYLOAD_LENGTH = struct.Struct("!Q")
+
+def file_digest(path):
+    """
+    SHA-256 of a file's contents, read in 1 MB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class MatchMemo:
+    """
+    Fuzzy match results of one table, keyed by (threshold, key). Holds at
+    most `max_entries`; the least recently used are dropped first.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_MATCHES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get_many(self, threshold, keys):
+        """
+        Returns a dict of key -> match (None = known non-match) for the remembered keys.
+        """
+        found = {}
+        for key in keys:
+            entry = (threshold, key)
+            if entry in self.entries:
+                self.entries.move_to_end(entry)
+                found[key] = self.entries[entry]
+        return found
+
+    def put_many(self, threshold, results):
+        for key, match in results.items():
+            self.entries[(threshold, key)] = match
+            self.entries.move_to_end((threshold, key))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+class ResidentLookupTable:
+    """
+    A lookup table held in memory with its indexes, reloaded only when the
+    source file's contents change.
+    """
+
+    def __init__(self, path, key, max_cached_matches=MAX_CACHED_MATCHES):
+        self.path = os.path.abspath(path)
+        self.key = list(key)
+        self.max_cached_matches = max_cached_matches
+        self.stat = None
+        self.digest = None
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        stat = os.stat(self.path)
+        df = read_table(self.path)
+        missing = [col for col in self.key if col not in df.columns]
+        if missing:
+            raise KeyError(f"Key column(s) not found in {self.path}: {', '.join(missing)}")
+
+        self.df = df
+        # Exact key index, probed by every left/inner join
+        self.index = LookupIndex(df, self.key)
+        # Fuzzy index over the first key column: distinct keys and their prefix/suffix blocks
+        self.choices = list(dict.fromkeys(c for c in df[self.key[0]] if isinstance(c, str)))
+        self.choice_blocks = _block_index(self.choices, BLOCK_WIDTH)
+        # With a composite key the other columns must match exactly: distinct key rows grouped by them
+        self.composite_index = composite_choice_index(df, self.key[:1], self.key[1:]) if len(self.key) > 1 else None
+        self.fuzzy_matches = MatchMemo(self.max_cached_matches)
+        self.stat = (stat.st_size, stat.st_mtime_ns)
+        self.digest = file_digest(self.path)
+        self.loads += 1
+
+    def refresh(self):
+        """
+        Reloads the table if the file changed on disk. Returns True when it was reloaded.
+        """
+        with self._lock:
+            stat = os.stat(self.path)
+            if (stat.st_size, stat.st_mtime_ns) == self.stat:
+                return False
+            # Touched but not edited (e.g. re-saved or copied): keep the loaded table
+            if file_digest(self.path) == self.digest:
+                self.stat = (stat.st_size, stat.st_mtime_ns)
+                return False
+            self._load()
+            return True
+
+    def _soft_match_composite(self, df1, threshold):
+        """
+        Composite keys: the first column is matched fuzzily within the rows
+        that share the other (exact) key columns, as apply_soft_match does.
+        Each distinct key row is scored once per table version and threshold.
+        """
+        fuzzy_key = self.key[0]
+        group_ids = df1.groupby(self.key, dropna=False, sort=False).ngroup().to_numpy()
+        _, first_rows = np.unique(group_ids, return_index=True)
+        queries = df1[self.key].iloc[first_rows].reset_index(drop=True)
+        tokens = [_cache_token(row) for row in queries.itertuples(index=False, name=None)]
+        with self._lock:
+            known = self.fuzzy_matches.get_many(threshold, tokens)
+            to_score = [i for i, token in enumerate(tokens) if token not in known]
+            if to_score:
+                matched = match_composite_keys(
+                    queries.iloc[to_score], None, {fuzzy_key: 1}, self.key[1:], threshold=threshold,
+                    choice_index=self.composite_index
+                )
+                scored = dict(zip((tokens[i] for i in to_score), matched[fuzzy_key].tolist()))
+                self.fuzzy_matches.put_many(threshold, scored)
+                known.update(scored)
+        resolved = np.array([known[token] for token in tokens] + [None], dtype=object)[:-1]
+        if len(group_ids):
+            df1[fuzzy_key] = resolved[group_ids]
+
+    def soft_match(self, df1, threshold=90):
+        """
+        Replaces df1's first key column (in place) with its best fuzzy match,
+        scoring only keys not seen before at this threshold.
+        """
+        if len(self.key) > 1:
+            self._soft_match_composite(df1, threshold)
+            return
+
+        fuzzy_key = self.key[0]
+        codes, uniques = pd.factorize(df1[fuzzy_key].astype(object))
+        string_uniques = [u for u in uniques if isinstance(u, str)]
+        with self._lock:
+            known = self.fuzzy_matches.get_many(threshold, string_uniques)
+            to_score = [u for u in string_uniques if u not in known]
+            if to_score:
+                scored = dict(zip(to_score, fuzzy_match_keys(
+                    to_score, self.choices, threshold, choice_blocks=self.choice_blocks
+                )))
+                self.fuzzy_matches.put_many(threshold, scored)
+                known.update(scored)
+        resolved = [known.get(u) if isinstance(u, str) else None for u in uniques]
+        resolved = pd.Series([match if match is not None else unique
+                              for match, unique in zip(resolved, uniques)], dtype=object)
+        matched = resolved.reindex(codes).to_numpy(copy=True)
+        missing = codes == -1
+        if missing.any():
+            matched[missing] = df1[fuzzy_key].to_numpy(dtype=object)[missing]
+        df1[fuzzy_key] = matched
+
+    def vlookup(self, df1, columns_to_return=None, join_type='left', soft_match=False, threshold=90):
+        """
+        Same result as super_vlookup(df1, <this table>, key, ...), using the resident indexes.
+        """
+        if soft_match:
+            self.soft_match(df1, threshold)
+        columns = [col for col in columns_to_return if col not in self.key] if columns_to_return else None
+        if join_type in ('left', 'inner'):
+            return self.index.merge(df1, join_type, columns)[0]
+        df2 = self.df[self.key + columns] if columns else self.df
+        return pd.merge(df1, df2, on=self.key, how=join_type)
+
+    def describe(self):
+        return {
+            "path": self.path,
+            "key": self.key,
+            "rows": len(self.df),
+            "loads": self.loads,
+            "sha256": self.digest,
+            "fuzzy_keys_cached": len(self.fuzzy_matches),
+        }
+
+def frame_to_bytes(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def bytes_to_frame(payload):
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+def _recv_exactly(sock_file, size):
+    data = sock_file.read(size)
+    if len(data) != size:
+        raise ConnectionError("Connection closed mid-message.")
+    return data
+
+def send_message(sock_file, header, payload=b""):
+    header_bytes = json.dumps(header).encode("utf-8")
+    sock_file.write(HEADER_LENGTH.pack(len(header_bytes)) + header_bytes + PAYLOAD_LENGTH.pack(len(payload)))
+    # No write for an empty payload: the peer may already have read the reply and hung up
+    if payload:
+        sock_file.write(payload)
+    sock_file.flush()
+
+def receive_message(sock_file):
+    (header_size,) = HEADER_LENGTH.unpack(_recv_exactly(sock_file, HEADER_LENGTH.size))
+    header = json.loads(_recv_exactly(sock_file, header_size))
+    (payload_size,) = PAYLOAD_LENGTH.unpack(_recv_exactly(sock_file, PAYLOAD_LENGTH.size))
+    return header, _recv_exactly(sock_file, payload_size)
+
+class LookupRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Answers requests until the client disconnects. Each request is a JSON
+    header ({"op": "vlookup" | "status" | "load", ...}) plus, for vlookups, the
+    main-table rows.
+    """
+
+    def handle(self):
+        while True:
+            try:
+                header, payload = receive_message(self.rfile)
+            except (ConnectionError, struct.error):
+                return
+            try:
+                response, body = self.server.dispatch(header, payload)
+                response["ok"] = True
+            except Exception as e:
+                response, body = {"ok": False, "error": f"{type(e).__name__}: {e}"}, b""
+            send_message(self.wfile, response, body)
+
+class _LookupServerMixin:
+    daemon_threads = True
+
+    def setup_tables(self, allowed_dirs=None, token=None, max_cached_matches=MAX_CACHED_MATCHES):
+        self.tables = {}
+        self.max_cached_matches = max_cached_matches
+        self._tables_lock = threading.Lock()  # Guards the dicts only, never held while loading
+        self._load_locks = {}
+        self.allowed_dirs = [os.path.realpath(d) for d in (allowed_dirs or [os.getcwd()])]
+        self.token = token
+
+    def check_path(self, path):
+        """
+        Resolves a requested lookup path, refusing anything that is not a table
+        file under one of the allowed directories.
+        """
+        real_path = os.path.realpath(path)
+        if not real_path.lower().endswith(TABLE_FILE_TYPES):
+            raise PermissionError(f"Not a table file: {path}")
+        if not any(os.path.commonpath([real_path, d]) == d for d in self.allowed_dirs):
+            raise PermissionError(f"{path} is outside the server's allowed directories")
+        return real_path
+
+    def get_table(self, path, key):
+        """
+        Returns the resident table for (path, key), loading it on first use and
+        refreshing it if the file changed. Returns (table, reloaded). Loading
+        one table only blocks requests for that same table.
+        """
+        table_id = (self.check_path(path), tuple(key))
+        with self._tables_lock:
+            table = self.tables.get(table_id)
+            load_lock = self._load_locks.setdefault(table_id, threading.Lock())
+        if table is None:
+            with load_lock:
+                with self._tables_lock:
+                    table = self.tables.get(table_id)
+                if table is None:
+                    table = ResidentLookupTable(table_id[0], key, self.max_cached_matches)
+                    with self._tables_lock:
+                        self.tables[table_id] = table
+                    return table, True
+        return table, table.refresh()
+
+    def dispatch(self, header, payload):
+        if self.token is not None and not hmac.compare_digest(str(header.get("token", "")), self.token):
+            raise PermissionError("Missing or wrong token")
+        op = header.get("op")
+        if op == "status":
+            with self._tables_lock:
+                tables = list(self.tables.values())
+            return {"tables": [t.describe() for t in tables]}, b""
+        if op == "load":
+            table, reloaded = self.get_table(header["lookup"], header["key"])
+            return {"reloaded": reloaded, "table": table.describe()}, b""
+        if op == "vlookup":
+            start = time.perf_counter()
+            table, reloaded = self.get_table(header["lookup"], header["key"])
+            merged = table.vlookup(
+                bytes_to_frame(payload), header.get("columns"), header.get("join", "left"),
+                header.get("soft_match", False), header.get("threshold", 90)
+            )
+            return {"rows": len(merged), "reloaded": reloaded,
+                    "seconds": round(time.perf_counter() - start, 4)}, frame_to_bytes(merged)
+        raise ValueError(f"Unknown op: {op!r}")
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class UnixLookupServer(_LookupServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        pass
+
+class TCPLookupServer(_LookupServerMixin, socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+
+def remove_stale_socket(socket_path):
+    """
+    Removes a Unix socket left behind by a server that is no longer running.
+    Refuses to touch anything that is not a socket, or a socket a live server
+    is still listening on.
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{socket_path} exists and is not a socket; not removing it")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A lookup server is already listening on {socket_path}")
+
+def write_token(token_path=DEFAULT_TOKEN_PATH):
+    """
+    Creates a new random token in a file only its owner can read, and returns it.
+    """
+    if os.path.exists(token_path):
+        os.remove(token_path)
+    token = secrets.token_hex(32)
+    descriptor = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, "w") as f:
+        f.write(token)
+    return token
+
+def make_server(socket_path=DEFAULT_SOCKET_PATH, port=None, allowed_dirs=None, token_path=DEFAULT_TOKEN_PATH,
+                max_cached_matches=MAX_CACHED_MATCHES):
+    """
+    Creates a server on a Unix socket, or on 127.0.0.1:`port` when a port is
+    given (requests must then carry the token written to `token_path`). Only
+    table files under `allowed_dirs` (default: the current directory) are served.
+    """
+    token = None
+    if port is not None:
+        server = TCPLookupServer(("127.0.0.1", port), LookupRequestHandler)
+        token = write_token(token_path)
+    else:
+        remove_stale_socket(socket_path)
+        # Only the current user may talk to the server; the umask closes the gap between bind and chmod
+        old_umask = os.umask(0o177)
+        try:
+            server = UnixLookupServer(socket_path, LookupRequestHandler)
+        finally:
+            os.umask(old_umask)
+        os.chmod(socket_path, 0o600)
+    server.setup_tables(allowed_dirs, token, max_cached_matches)
+    return server
+
+class LookupClient:
+    """
+    Client for a running lookup server. Keeps one connection open for any
+    number of requests.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, port=None, token=None, token_path=DEFAULT_TOKEN_PATH):
+        self.token = token
+        if port is not None:
+            if self.token is None and os.path.exists(token_path):
+                with open(token_path) as f:
+                    self.token = f.read().strip()
+            self.sock = socket.create_connection(("127.0.0.1", port))
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(socket_path)
+        self.file = self.sock.makefile("rwb")
+
+    def request(self, header, payload=b""):
+        if self.token is not None:
+            header = dict(header, token=self.token)
+        send_message(self.file, header, payload)
+        response, body = receive_message(self.file)
+        if not response.get("ok"):
+            raise RuntimeError(f"Lookup server error: {response.get('error')}")
+        return response, body
+
+    def vlookup(self, df1, lookup_path, key, columns_to_return=None, join_type='left',
+                soft_match=False, threshold=90):
+        """
+        Same arguments and result as super_vlookup, with the lookup table given
+        by its path on the server's machine.
+        """
+        header = {
+            "op": "vlookup", "lookup": os.path.abspath(lookup_path), "key": list(key),
+            "columns": columns_to_return, "join": join_type,
+            "soft_match": soft_match, "threshold": threshold,
+        }
+        _, body = self.request(header, frame_to_bytes(df1))
+        return bytes_to_frame(body)
+
+    def status(self):
+        return self.request({"op": "status"})[0]["tables"]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def serve(args):
+    server = make_server(args.socket, args.port, args.allow_dir, max_cached_matches=args.max_cached_matches)
+    for spec in args.preload or []:
+        path, _, key = spec.rpartition(":")
+        print(f"Loading {path}...")
+        server.get_table(path, _split_list(key))
+    print(f"Listening on {f'127.0.0.1:{args.port}' if args.port is not None else args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.port is None and os.path.exists(args.socket):
+            os.remove(args.socket)
+        if args.port is not None and os.path.exists(DEFAULT_TOKEN_PATH):
+            os.remove(DEFAULT_TOKEN_PATH)
+
+def query(args):
+    start = time.perf_counter()
+    df1 = read_table(args.main)
+    with LookupClient(args.socket, args.port) as client:
+        merged = client.vlookup(df1, args.lookup, _split_list(args.key), _split_list(args.columns),
+                                args.join, args.soft_match, args.threshold)
+    write_table(merged, args.output)
+    print(f"Wrote {len(merged)} rows to {args.output} in {time.perf_counter() - start:.2f}s")
+
+def status(args):
+    with LookupClient(args.socket, args.port) as client:
+        for table in client.status():
+            print(f"{table['path']} [{', '.join(table['key'])}]: {table['rows']:,} rows, "
+                  f"loaded {table['loads']}x, {table['fuzzy_keys_cached']:,} fuzzy matches cached")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Resident lookup-table server for super_vlookup.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="Unix socket path")
+    parser.add_argument("--port", type=int, help="Use 127.0.0.1:PORT instead of a Unix socket")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the server")
+    serve_parser.add_argument("--preload", action="append",
+                              help="PATH:KEY[,KEY...] to load at start-up (repeatable)")
+    serve_parser.add_argument("--allow-dir", action="append",
+                              help="Directory whose table files clients may look up (repeatable; "
+                                   "default: the current directory)")
+    serve_parser.add_argument("--max-cached-matches", type=int, default=MAX_CACHED_MATCHES,
+                              help="Fuzzy matches remembered per table (least recently used dropped first)")
+    serve_parser.set_defaults(func=serve)
+
+    query_parser = commands.add_parser("query", help="Join a main table against a resident lookup table")
+    query_parser.add_argument("main", help="Main table file")
+    query_parser.add_argument("lookup", help="Lookup table file (loaded by the server)")
+    query_parser.add_argument("-o", "--output", required=True, help="Output file")
+    query_parser.add_argument("-k", "--key", required=True, help="Column(s) to merge on, comma-separated")
+    query_parser.add_argument("-c", "--columns", help="Lookup columns to return, comma-separated")
+    query_parser.add_argument("-j", "--join", default="left", choices=["left", "right", "outer", "inner"])
+    query_parser.add_argument("--soft-match", action="store_true", help="Enable fuzzy matching")
+    query_parser.add_argument("--threshold", type=int, default=90, help="Fuzzy match threshold (0-100)")
+    query_parser.set_defaults(func=query)
+
+    status_parser = commands.add_parser("status", help="List the tables the server has loaded")
+    status_parser.set_defaults(func=status)
+
+    args = parser.parse_args(argv)
+    if args.port is None and not hasattr(socketserver, "UnixStreamServer"):
+        parser.error("Unix sockets are not available on this platform; pass --port")
+    args.func(args)
+
+if __name__ == "__main__":
+    cli(sys.argv[1:])
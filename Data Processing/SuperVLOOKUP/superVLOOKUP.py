@@ -1,9 +1,529 @@
+import numpy as np
 import pandas as pd
 from rapidfuzz import process, fuzz
-from tkinter import Tk, filedialog, messagebox, simpledialog
+import argparse
+import json
 import os
+import re
+import hashlib
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
 
-def super_vlookup(df1, df2, key, columns_to_return=None, join_type='left', soft_match=False, threshold=90):
+# Fuzzy match results are cached here between runs. Only the results for the most recently
+# used lookup tables are kept, within a total number of cached matches.
+DEFAULT_MATCH_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".super_vlookup_cache.sqlite")
+CACHE_BATCH_SIZE = 500
+CACHE_MAX_FINGERPRINTS = 20
+CACHE_MAX_ROWS = 2_000_000
+
+TABLE_FILE_TYPES = ('.csv', '.xlsx', '.parquet', '.feather', '.arrow')
+
+# Memory allowed for one batch of fuzzy score matrices; the batch size shrinks as blocks grow
+MATCH_MEMORY_BUDGET = 256 * 1024 ** 2
+
+# Legal-entity suffixes ("Acme Inc.", "Acme Holdings Ltd") are shared by most company
+# names, so they are dropped before taking a suffix block key
+LEGAL_SUFFIXES = re.compile(
+    r"(?:[\s,]+(?:inc|incorporated|ltd|limited|llc|llp|corp|corporation|co|company|plc|gmbh|ag|sa|"
+    r"sas|srl|bv|nv|pty|oy|ab|as)\.?)+[\s.,]*$"
+)
+
+def _block_index(values, block_width):
+    """
+    Groups value positions by their lower-cased prefix and suffix (ignoring
+    legal-entity suffixes such as "Inc" or "Ltd").
+    Returns (prefix_blocks, suffix_blocks), each a dict of block key -> list of positions.
+    """
+    prefix_blocks, suffix_blocks = {}, {}
+    for i, value in enumerate(values):
+        lowered = value.lower()
+        stem = LEGAL_SUFFIXES.sub("", lowered).rstrip() or lowered
+        prefix_blocks.setdefault(lowered[:block_width], []).append(i)
+        suffix_blocks.setdefault(stem[-block_width:], []).append(i)
+    return prefix_blocks, suffix_blocks
+
+def _score_block(query_columns, query_positions, choice_columns, choice_positions,
+                 weights, scorers, best_score, best_choice, threshold, batch_size, workers):
+    """
+    Scores a block of queries against a block of choices with process.cdist in
+    batches and keeps the best choice per query in best_score/best_choice.
+    With several columns the score is the weighted average of the per-column
+    score matrices. Ties go to the earliest choice, like process.extractOne.
+
+    A batch holds at most `batch_size` queries, fewer when the block has so
+    many candidates that the score matrices would exceed MATCH_MEMORY_BUDGET.
+    """
+    total_weight = sum(weights)
+    candidate_positions = np.asarray(choice_positions)
+    candidates = [[column[i] for i in choice_positions] for column in choice_columns]
+    # float32 cdist output per column, plus the float64 weighted copy and running sum
+    bytes_per_query = len(choice_positions) * (4 if len(weights) == 1 else 4 + 8 + 8)
+    batch_size = max(1, min(batch_size, MATCH_MEMORY_BUDGET // max(bytes_per_query, 1)))
+    for start in range(0, len(query_positions), batch_size):
+        batch_positions = np.asarray(query_positions[start:start + batch_size])
+        scores = None
+        for column, column_candidates, weight, scorer in zip(query_columns, candidates, weights, scorers):
+            # A column scoring below this can't lift the weighted score to the
+            # threshold even if every other column scores 100, so cdist may skip it
+            column_cutoff = max(0, (threshold * total_weight - (total_weight - weight) * 100) / weight)
+            column_scores = process.cdist(
+                [column[i] for i in batch_positions], column_candidates,
+                scorer=scorer, score_cutoff=column_cutoff, workers=workers
+            )
+            if len(weights) > 1:
+                column_scores = column_scores * (weight / total_weight)
+            scores = column_scores if scores is None else scores + column_scores
+        best_columns = scores.argmax(axis=1)
+        scores = scores[np.arange(len(batch_positions)), best_columns]
+        choice_index = candidate_positions[best_columns]
+        current_score = best_score[batch_positions]
+        better = (scores > current_score) | (
+            (scores == current_score) & (choice_index < best_choice[batch_positions])
+        )
+        best_score[batch_positions[better]] = scores[better]
+        best_choice[batch_positions[better]] = choice_index[better]
+
+def _best_matches(query_columns, query_positions, choice_columns, weights, scorers, threshold,
+                  blocking=True, block_width=2, batch_size=2048, workers=-1, choice_blocks=None):
+    """
+    Core of the fuzzy join engine. Returns an array with, for each query row,
+    the position of the best-scoring choice row, or -1 where nothing reached
+    the threshold. Blocking uses the column with the highest weight; pass
+    `choice_blocks` (from _block_index) to reuse a block index built earlier.
+    """
+    num_queries = len(query_columns[0])
+    num_choices = len(choice_columns[0])
+    best_score = np.full(num_queries, -1.0)
+    best_choice = np.full(num_queries, num_choices, dtype=np.int64)
+    if num_choices and len(query_positions):
+        if blocking:
+            primary = int(np.argmax(weights))
+            choice_prefixes, choice_suffixes = choice_blocks or _block_index(choice_columns[primary], block_width)
+            primary_queries = [query_columns[primary][i] for i in query_positions]
+            query_prefixes, query_suffixes = _block_index(primary_queries, block_width)
+            for query_blocks, choice_blocks in ((query_prefixes, choice_prefixes),
+                                                (query_suffixes, choice_suffixes)):
+                for block_key, positions in query_blocks.items():
+                    if block_key in choice_blocks:
+                        _score_block(query_columns, [query_positions[i] for i in positions],
+                                     choice_columns, choice_blocks[block_key], weights, scorers,
+                                     best_score, best_choice, threshold, batch_size, workers)
+        else:
+            _score_block(query_columns, query_positions, choice_columns, list(range(num_choices)),
+                         weights, scorers, best_score, best_choice, threshold, batch_size, workers)
+
+    matched = (best_score >= threshold) & (best_choice < num_choices)
+    return np.where(matched, best_choice, -1)
+
+def fuzzy_match_keys(queries, choices, threshold=90, scorer=fuzz.ratio, blocking=True,
+                     block_width=2, batch_size=2048, workers=-1, choice_blocks=None):
+    """
+    Finds the best fuzzy match in `choices` for every value in `queries`.
+
+    Each query is scored once (instead of the two extractOne calls per row) and
+    scoring runs in batches through rapidfuzz's process.cdist on all cores.
+    With blocking, a query is only compared with choices that share its first
+    or last `block_width` characters, which cuts the O(n*m) comparisons down to
+    the size of the blocks. Without blocking every choice is scored and the
+    results are the same as process.extractOne.
+
+    Args:
+        queries (list): Values to match. Non-string values are never matched.
+        choices (list): Candidate values from the lookup table.
+        threshold (int): Minimum score (0-100) for a match.
+        scorer (callable): rapidfuzz scorer. Defaults to fuzz.ratio.
+        blocking (bool): Only score candidates from the same prefix/suffix block.
+        block_width (int): Number of characters used for the block keys.
+        batch_size (int): Maximum number of queries scored per cdist call (lowered
+            automatically for large blocks to stay within MATCH_MEMORY_BUDGET).
+        workers (int): cdist worker threads (-1 = all cores).
+        choice_blocks (tuple, optional): Block index of `choices` from _block_index, for
+            callers that match against the same choices repeatedly. `choices` must then
+            already be distinct strings.
+
+    Returns:
+        list: The matched choice for each query, or None where nothing scored
+        at or above the threshold.
+    """
+    if choice_blocks is None:
+        # Duplicate choices can never win over their first occurrence
+        unique_choices = list(dict.fromkeys(c for c in choices if isinstance(c, str)))
+    else:
+        unique_choices = choices
+    query_positions = [i for i, q in enumerate(queries) if isinstance(q, str)]
+    best = _best_matches([queries], query_positions, [unique_choices], [1], [scorer], threshold,
+                         blocking, block_width, batch_size, workers, choice_blocks)
+    return [unique_choices[b] if b >= 0 else None for b in best]
+
+def _resolve_scorer(scorer):
+    """
+    Accepts a rapidfuzz scorer or its name in rapidfuzz.fuzz (e.g. "token_sort_ratio").
+    """
+    return getattr(fuzz, scorer) if isinstance(scorer, str) else scorer
+
+def _cache_token(values):
+    """
+    Text form of a row of key values for the match cache (type-tagged, so 1 and "1" differ).
+    """
+    return json.dumps([f"{type(v).__name__}:{v}" for v in values])
+
+def composite_fingerprint(choices, fuzzy, weights, scorers, block_on, blocking=True, block_width=2):
+    """
+    Fingerprints distinct lookup key rows together with the composite match
+    settings, like lookup_fingerprint() does for single-column keys.
+    """
+    digest = hashlib.sha256()
+    settings = [block_on, fuzzy, weights, [getattr(s, '__name__', str(s)) for s in scorers], blocking, block_width]
+    digest.update(json.dumps(settings).encode("utf-8"))
+    for row in choices.itertuples(index=False, name=None):
+        digest.update(b"\x1f" + _cache_token(row).encode("utf-8"))
+    return digest.hexdigest()
+
+def composite_choice_index(df2, fuzzy, block_on):
+    """
+    Distinct lookup key rows that can be fuzzy-matched (no missing fuzzy
+    value) and their positions per exact-key block. Build it once to match
+    against the same lookup table repeatedly (see match_composite_keys).
+    """
+    choices = df2[list(block_on) + list(fuzzy)].drop_duplicates()
+    choices = choices[choices[list(fuzzy)].notna().all(axis=1)].reset_index(drop=True)
+    if block_on:
+        choice_groups = choices.groupby(list(block_on), dropna=False, sort=False).indices
+    else:
+        choice_groups = {None: np.arange(len(choices))}
+    return choices, choice_groups
+
+def match_composite_keys(df1, df2, fuzzy_columns, block_on=None, scorers=None, threshold=90,
+                         blocking=True, block_width=2, batch_size=2048, workers=-1, cache_path=None,
+                         choice_index=None, fingerprint=None):
+    """
+    Fuzzy-matches rows on several key columns at once.
+
+    The score of a candidate is the weighted average of the per-column scores,
+    computed as cdist matrices in batches. Columns in `block_on` must match
+    exactly and split the candidates into blocks, so a row is only compared
+    with lookup rows that share its exact-key values. Each distinct key
+    combination is matched once. Non-string values are compared as text
+    (e.g. a zip code 10001 or 10001.0 as "10001"); rows with a missing fuzzy
+    value are never matched.
+
+    Args:
+        df1 (DataFrame): The main table.
+        df2 (DataFrame): The lookup table.
+        fuzzy_columns (dict): Column -> weight for the fuzzily matched columns.
+        block_on (list, optional): Exact-match columns used as blocking keys.
+        scorers (dict, optional): Column -> rapidfuzz scorer (or its name). Defaults to fuzz.ratio.
+        threshold (int): Minimum weighted score (0-100) for a match.
+        blocking (bool): Also block on the prefix/suffix of the highest-weight column.
+        cache_path (str, optional): FuzzyMatchCache file; key combinations matched
+            in earlier runs against the same lookup keys are not scored again.
+        choice_index (tuple, optional): composite_choice_index() of df2 built earlier
+            (df2 may then be None).
+        fingerprint (str, optional): composite_fingerprint() of that index, if already computed.
+
+    Returns:
+        DataFrame: df1's fuzzy columns, with matched rows replaced by the lookup table's values.
+    """
+    block_on = list(block_on or [])
+    fuzzy = list(fuzzy_columns)
+    weights = [float(fuzzy_columns[col]) for col in fuzzy]
+    scorers = [_resolve_scorer((scorers or {}).get(col, fuzz.ratio)) for col in fuzzy]
+    cols = block_on + fuzzy
+
+    # Distinct key combinations on both sides; lookup rows with a missing fuzzy value can't be matched
+    group_ids = df1.groupby(cols, dropna=False, sort=False).ngroup().to_numpy()
+    _, first_rows = np.unique(group_ids, return_index=True)
+    queries = df1[cols].iloc[first_rows].reset_index(drop=True)
+    choices, choice_groups = choice_index or composite_choice_index(df2, fuzzy, block_on)
+
+    def as_text(frame, col):
+        # A numeric column holding blanks is float, so 10001.0 is compared as "10001"
+        return [v if isinstance(v, str) else str(int(v)) if isinstance(v, float) and v.is_integer() else str(v)
+                for v in frame[col].tolist()]
+
+    # Position in `choices` of each query's match, -1 for none
+    best_choice = np.full(len(queries), -1, dtype=np.int64)
+    to_score = np.flatnonzero(queries[fuzzy].notna().all(axis=1).to_numpy())
+
+    cache = FuzzyMatchCache(cache_path) if cache_path and len(to_score) else None
+    try:
+        if cache:
+            fingerprint = fingerprint or composite_fingerprint(choices, fuzzy, weights, scorers, block_on,
+                                                               blocking, block_width)
+            choice_positions = {_cache_token(row): i for i, row in enumerate(choices.itertuples(index=False, name=None))}
+            query_tokens = [_cache_token(row) for row in queries.iloc[to_score].itertuples(index=False, name=None)]
+            cached = cache.get_many(fingerprint, threshold, query_tokens)
+            hit = np.array([token in cached for token in query_tokens], dtype=bool)
+            for row, token in zip(to_score[hit], np.asarray(query_tokens, dtype=object)[hit]):
+                best_choice[row] = choice_positions[cached[token]] if cached[token] is not None else -1
+            to_score = to_score[~hit]
+
+        pending = queries.iloc[to_score]
+        if block_on:
+            query_groups = {k: to_score[v] for k, v in pending.groupby(block_on, dropna=False, sort=False).indices.items()}
+        else:
+            query_groups = {None: to_score}
+
+        for block_key, query_rows in query_groups.items():
+            choice_rows = choice_groups.get(block_key)
+            if choice_rows is None or not len(query_rows):
+                continue
+            block_queries = queries.iloc[query_rows]
+            block_choices = choices.iloc[choice_rows]
+            best = _best_matches(
+                [as_text(block_queries, col) for col in fuzzy], list(range(len(query_rows))),
+                [as_text(block_choices, col) for col in fuzzy], weights, scorers, threshold,
+                blocking, block_width, batch_size, workers
+            )
+            best_choice[query_rows[best >= 0]] = choice_rows[best[best >= 0]]
+
+        if cache and len(to_score):
+            choice_tokens = [_cache_token(row) for row in choices.itertuples(index=False, name=None)]
+            cache.put_many(fingerprint, threshold, {
+                _cache_token(row): (choice_tokens[best_choice[i]] if best_choice[i] >= 0 else None)
+                for i, row in zip(to_score, queries.iloc[to_score].itertuples(index=False, name=None))
+            })
+    finally:
+        if cache:
+            cache.close()
+
+    matched = queries[fuzzy].copy()
+    hit = best_choice >= 0
+    if hit.any():
+        matched.iloc[np.flatnonzero(hit), :] = choices[fuzzy].iloc[best_choice[hit]].to_numpy()
+
+    # Broadcast the per-combination results back to every row of df1
+    result = matched.iloc[group_ids]
+    result.index = df1.index
+    return result
+
+class FuzzyMatchCache:
+    """
+    On-disk cache of fuzzy match results, keyed by
+    (lookup-table fingerprint, threshold, key) -> matched key (or no match).
+    Re-running a lookup against an unchanged lookup table only has to score
+    keys that have not been seen before.
+
+    A lookup table that changes gets a new fingerprint, so results for old
+    fingerprints are never read again. The cache keeps the results of the
+    `max_fingerprints` most recently used fingerprints, and drops the least
+    recently used ones until it holds at most `max_rows` matches.
+    """
+
+    def __init__(self, cache_path, max_fingerprints=CACHE_MAX_FINGERPRINTS, max_rows=CACHE_MAX_ROWS):
+        self.max_fingerprints = max_fingerprints
+        self.max_rows = max_rows
+        self.connection = sqlite3.connect(cache_path, timeout=60)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS fuzzy_matches ("
+            " fingerprint TEXT NOT NULL, threshold REAL NOT NULL, query TEXT NOT NULL, match TEXT,"
+            " PRIMARY KEY (fingerprint, threshold, query)) WITHOUT ROWID"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints (fingerprint TEXT PRIMARY KEY, last_used REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def _touch(self, fingerprint):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO fingerprints (fingerprint, last_used) VALUES (?, ?)", (fingerprint, time.time())
+        )
+
+    def prune(self, keep=None):
+        """
+        Drops the results of least recently used fingerprints beyond
+        max_fingerprints, then more of them (never `keep`) while the cache
+        holds more than max_rows matches. Fingerprints written by versions
+        without usage tracking count as least recently used.
+        """
+        self.connection.execute(
+            "INSERT OR IGNORE INTO fingerprints (fingerprint, last_used) "
+            "SELECT DISTINCT fingerprint, 0 FROM fuzzy_matches"
+        )
+        by_age = [row[0] for row in self.connection.execute(
+            "SELECT fingerprint FROM fingerprints ORDER BY last_used DESC"
+        )]
+        stale = [f for f in by_age[self.max_fingerprints:] if f != keep]
+        counts = dict(self.connection.execute("SELECT fingerprint, COUNT(*) FROM fuzzy_matches GROUP BY fingerprint"))
+        total = sum(counts.values()) - sum(counts.get(f, 0) for f in stale)
+        for fingerprint in reversed(by_age[:self.max_fingerprints]):
+            if total <= self.max_rows:
+                break
+            if fingerprint != keep:
+                stale.append(fingerprint)
+                total -= counts.get(fingerprint, 0)
+        for fingerprint in stale:
+            self.connection.execute("DELETE FROM fuzzy_matches WHERE fingerprint = ?", (fingerprint,))
+            self.connection.execute("DELETE FROM fingerprints WHERE fingerprint = ?", (fingerprint,))
+        self.connection.commit()
+
+    def get_many(self, fingerprint, threshold, queries):
+        """
+        Returns a dict of query -> match (None = known non-match) for the cached queries.
+        """
+        found = {}
+        for start in range(0, len(queries), CACHE_BATCH_SIZE):
+            batch = queries[start:start + CACHE_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.connection.execute(
+                "SELECT query, match FROM fuzzy_matches"
+                f" WHERE fingerprint = ? AND threshold = ? AND query IN ({placeholders})",
+                [fingerprint, threshold, *batch]
+            )
+            found.update(rows)
+        self._touch(fingerprint)
+        self.connection.commit()
+        return found
+
+    def put_many(self, fingerprint, threshold, results):
+        """
+        Stores a dict of query -> match (None for no match).
+        """
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO fuzzy_matches (fingerprint, threshold, query, match) VALUES (?, ?, ?, ?)",
+            [(fingerprint, threshold, query, match) for query, match in results.items()]
+        )
+        self._touch(fingerprint)
+        self.prune(keep=fingerprint)
+
+    def close(self):
+        self.connection.close()
+
+def lookup_fingerprint(choices, scorer=fuzz.ratio, blocking=True, block_width=2):
+    """
+    Fingerprints the lookup keys together with the match settings, so cached
+    results are only reused when they would come out the same.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{getattr(scorer, '__name__', scorer)}|{blocking}|{block_width}".encode("utf-8"))
+    for choice in dict.fromkeys(c for c in choices if isinstance(c, str)):
+        digest.update(b"\x1f" + choice.encode("utf-8"))
+    return digest.hexdigest()
+
+def match_unique_keys(keys, choices, threshold=90, scorer=fuzz.ratio, blocking=True,
+                      block_width=2, workers=-1, cache_path=None, choice_blocks=None, fingerprint=None):
+    """
+    Fuzzy-matches only the distinct values of `keys` and broadcasts the results
+    back to every row. With `cache_path`, results are read from and written to
+    a FuzzyMatchCache so repeated runs only score new keys. `choice_blocks` and
+    `fingerprint` may be passed in when they were built earlier for the same
+    (distinct) choices.
+
+    Returns:
+        list: For each key, the matched choice or the original key when nothing
+        matched.
+    """
+    codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+    uniques = list(uniques)
+    string_uniques = [u for u in uniques if isinstance(u, str)]
+
+    cached = {}
+    cache = FuzzyMatchCache(cache_path) if cache_path else None
+    try:
+        if cache:
+            fingerprint = fingerprint or lookup_fingerprint(choices, scorer, blocking, block_width)
+            cached = cache.get_many(fingerprint, threshold, string_uniques)
+        to_score = [u for u in string_uniques if u not in cached]
+        scored = dict(zip(to_score, fuzzy_match_keys(
+            to_score, choices, threshold, scorer, blocking, block_width, workers=workers,
+            choice_blocks=choice_blocks
+        )))
+        if cache and scored:
+            cache.put_many(fingerprint, threshold, scored)
+    finally:
+        if cache:
+            cache.close()
+
+    results = {**cached, **scored}
+    # One spare slot at the end for factorize()'s -1 code (missing values)
+    resolved = np.empty(len(uniques) + 1, dtype=object)
+    for i, unique in enumerate(uniques):
+        match = results.get(unique) if isinstance(unique, str) else None
+        resolved[i] = match if match is not None else unique
+    values = resolved[codes]
+    # Missing values keep whatever they were (None or NaN)
+    missing = codes == -1
+    if missing.any():
+        values[missing] = np.asarray(keys, dtype=object)[missing]
+    return values.tolist()
+
+class SoftMatcher:
+    """
+    Fuzzy key matching against one lookup table, prepared once: the distinct
+    lookup keys, their block index and the match-cache fingerprint are built
+    when the matcher is created and reused by every apply(), e.g. for each
+    chunk of a main table. See super_vlookup() for the arguments.
+    """
+
+    def __init__(self, df2, key, threshold=90, fuzzy_blocking=True, workers=-1, match_cache=None,
+                 fuzzy_columns=None, fuzzy_scorers=None, block_width=2):
+        if fuzzy_columns is None:
+            fuzzy_columns = {key[0]: 1}
+        elif not isinstance(fuzzy_columns, dict):
+            fuzzy_columns = {col: 1 for col in fuzzy_columns}
+        self.fuzzy_columns = fuzzy_columns
+        self.block_on = [col for col in key if col not in fuzzy_columns]
+        self.fuzzy_scorers = fuzzy_scorers
+        self.threshold = threshold
+        self.blocking = fuzzy_blocking
+        self.block_width = block_width
+        self.workers = workers
+        self.match_cache = match_cache
+        self.single = len(fuzzy_columns) == 1 and not self.block_on and not fuzzy_scorers
+
+        fuzzy = list(fuzzy_columns)
+        if self.single:
+            # Distinct string keys, as fuzzy_match_keys expects them with a prebuilt block index
+            self.choices = list(dict.fromkeys(c for c in df2[fuzzy[0]].tolist() if isinstance(c, str)))
+            self.choice_blocks = _block_index(self.choices, block_width) if fuzzy_blocking else None
+            self.fingerprint = (lookup_fingerprint(self.choices, fuzz.ratio, fuzzy_blocking, block_width)
+                                if match_cache else None)
+        else:
+            self.choice_index = composite_choice_index(df2, fuzzy, self.block_on)
+            self.fingerprint = None
+            if match_cache:
+                weights = [float(fuzzy_columns[col]) for col in fuzzy]
+                scorers = [_resolve_scorer((fuzzy_scorers or {}).get(col, fuzz.ratio)) for col in fuzzy]
+                self.fingerprint = composite_fingerprint(self.choice_index[0], fuzzy, weights, scorers,
+                                                         self.block_on, fuzzy_blocking, block_width)
+
+    def apply(self, df1):
+        """
+        Replaces the fuzzy key values in df1 (in place) with their best match,
+        so a regular exact merge picks them up.
+        """
+        if self.single:
+            # Each distinct key is matched once and the result is broadcast to its rows
+            fuzzy_key = next(iter(self.fuzzy_columns))
+            df1[fuzzy_key] = match_unique_keys(
+                df1[fuzzy_key].tolist(), self.choices, self.threshold, blocking=self.blocking,
+                block_width=self.block_width, workers=self.workers, cache_path=self.match_cache,
+                choice_blocks=self.choice_blocks, fingerprint=self.fingerprint
+            )
+        else:
+            matched = match_composite_keys(
+                df1, None, self.fuzzy_columns, self.block_on, self.fuzzy_scorers, self.threshold,
+                blocking=self.blocking, block_width=self.block_width, workers=self.workers,
+                cache_path=self.match_cache, choice_index=self.choice_index, fingerprint=self.fingerprint
+            )
+            for col in self.fuzzy_columns:
+                df1[col] = matched[col]
+
+def apply_soft_match(df1, df2, key, threshold=90, fuzzy_blocking=True, workers=-1,
+                     match_cache=None, fuzzy_columns=None, fuzzy_scorers=None):
+    """
+    Replaces the fuzzy key values in df1 (in place) with their best match from
+    df2, so a regular exact merge picks them up. See super_vlookup() for the
+    arguments.
+    """
+    SoftMatcher(df2, key, threshold, fuzzy_blocking, workers, match_cache,
+                fuzzy_columns, fuzzy_scorers).apply(df1)
+
+def super_vlookup(df1, df2, key, columns_to_return=None, join_type='left', soft_match=False, threshold=90,
+                  fuzzy_blocking=True, workers=-1, match_cache=None, fuzzy_columns=None,
+                  fuzzy_scorers=None, timings=None):
     """
     Perform a VLOOKUP-like operation with optional fuzzy matching.
 
@@ -15,6 +535,16 @@ def super_vlookup(df1, df2, key, columns_to_return=None, join_type='left', soft_
         join_type (str): Type of join - 'left', 'right', 'outer', 'inner'. Defaults to 'left'.
         soft_match (bool): Whether to use fuzzy matching. Defaults to False.
         threshold (int): Fuzzy match score threshold (0-100). Defaults to 90.
+        fuzzy_blocking (bool): Only compare keys that share a prefix or suffix. Much faster
+            on large tables; set to False to score every lookup key. Defaults to True.
+        workers (int): Number of threads used for fuzzy scoring (-1 = all cores).
+        match_cache (str, optional): Path of an on-disk fuzzy match cache. Defaults to no cache.
+        fuzzy_columns (dict or list, optional): Key columns to match fuzzily, with a weight per
+            column (a list means equal weights). Other key columns must match exactly and are
+            used as blocking keys. Defaults to the first key column.
+        fuzzy_scorers (dict, optional): Column -> rapidfuzz scorer or scorer name
+            (e.g. "token_sort_ratio"). Defaults to fuzz.ratio for every column.
+        timings (StageTimer, optional): Records how long the match and merge stages take.
 
     Returns:
         DataFrame: Merged DataFrame.
@@ -22,37 +552,419 @@ def super_vlookup(df1, df2, key, columns_to_return=None, join_type='left', soft_
     if columns_to_return:
         df2 = df2[key + columns_to_return]
 
+    timings = timings or StageTimer()
     if soft_match:
-        df2_key = df2[key[0]].tolist()
-        df1[key[0]] = df1[key[0]].apply(
-            lambda x: process.extractOne(x, df2_key, scorer=fuzz.ratio, score_cutoff=threshold)[0]
-            if process.extractOne(x, df2_key, scorer=fuzz.ratio, score_cutoff=threshold)
-            else x
-        )
+        with timings.stage('match'):
+            apply_soft_match(df1, df2, key, threshold, fuzzy_blocking, workers, match_cache,
+                             fuzzy_columns, fuzzy_scorers)
 
-    merged_df = pd.merge(df1, df2, on=key, how=join_type)
+    with timings.stage('merge'):
+        merged_df = pd.merge(df1, df2, on=key, how=join_type)
     return merged_df
 
+class StageTimer:
+    """
+    Collects wall-clock time per named stage (load, match, merge, write).
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self):
+        total = sum(self.stages.values())
+        lines = [f"{name:<8} {seconds:8.2f}s" for name, seconds in self.stages.items()]
+        lines.append(f"{'total':<8} {total:8.2f}s")
+        return "\n".join(lines)
+
+def _module_available(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+def read_table(path, columns=None):
+    """
+    Loads a CSV, XLSX, Parquet or Feather file into a DataFrame using the
+    fastest engine that is installed: the pyarrow CSV reader and calamine for
+    XLSX, falling back to pandas' default engines.
+    """
+    lower = path.lower()
+    if lower.endswith('.csv'):
+        engine = 'pyarrow' if _module_available('pyarrow') else 'c'
+        return pd.read_csv(path, engine=engine, usecols=columns)
+    if lower.endswith('.xlsx'):
+        engine = 'calamine' if _module_available('python_calamine') else 'openpyxl'
+        return pd.read_excel(path, engine=engine, usecols=columns)
+    if lower.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    if lower.endswith(('.feather', '.arrow')):
+        return pd.read_feather(path, columns=columns)
+    raise ValueError(f"Unsupported file type: {path} (expected one of {', '.join(TABLE_FILE_TYPES)})")
+
+def write_table(df, path):
+    """
+    Saves a DataFrame as CSV, XLSX, Parquet or Feather, based on the file extension.
+    """
+    lower = path.lower()
+    if lower.endswith('.csv'):
+        df.to_csv(path, index=False)
+    elif lower.endswith('.xlsx'):
+        df.to_excel(path, index=False)
+    elif lower.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    elif lower.endswith(('.feather', '.arrow')):
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        raise ValueError(f"Unsupported file type: {path} (expected one of {', '.join(TABLE_FILE_TYPES)})")
+
+def super_vlookup_range(df1, df2, on, by=None, columns_to_return=None, direction='backward',
+                        tolerance=None, join_type='left'):
+    """
+    Approximate-match lookup, like Excel's VLOOKUP(..., TRUE): each row of df1
+    gets the df2 row with the nearest `on` value, e.g. the price tier or
+    commission band that applies to an amount or date.
+
+    Both tables are sorted once and merged in a single pass with
+    pd.merge_asof, so the cost is O((n+m) log m) rather than a scan of df2 per
+    row. Rows keep df1's original order.
+
+    Args:
+        df1 (DataFrame): The main table.
+        df2 (DataFrame): The lookup table (e.g. tier start values).
+        on (str): Numeric or date column to match approximately.
+        by (list, optional): Columns that must match exactly (e.g. product line).
+        columns_to_return (list, optional): Columns to include from df2. Defaults to all.
+        direction (str): 'backward' (largest df2 value <= df1 value, Excel's behaviour),
+            'forward' (smallest value >=) or 'nearest'. Defaults to 'backward'.
+        tolerance (number or Timedelta, optional): Maximum distance for a match.
+        join_type (str): 'left' keeps unmatched df1 rows, 'inner' drops them.
+
+    Returns:
+        DataFrame: df1 with the matched df2 columns added.
+    """
+    if join_type not in ('left', 'inner'):
+        raise ValueError("Range lookups support 'left' and 'inner' joins only.")
+    by = list(by or [])
+    if columns_to_return:
+        df2 = df2[[on] + by + [col for col in columns_to_return if col not in by and col != on]]
+
+    matched_flag = '__range_matched'
+    row_id = '__range_row'
+    lookup = df2.dropna(subset=[on]).sort_values(on, kind='mergesort').assign(**{matched_flag: True})
+    main = df1.assign(**{row_id: np.arange(len(df1))})
+    # merge_asof refuses int vs float keys (an empty cell turns an int column into float)
+    if (main[on].dtype != lookup[on].dtype and pd.api.types.is_numeric_dtype(main[on])
+            and pd.api.types.is_numeric_dtype(lookup[on])):
+        main[on] = main[on].astype('float64')
+        lookup[on] = lookup[on].astype('float64')
+    # merge_asof wants an int tolerance for int keys and a float one for float keys
+    if isinstance(tolerance, (int, float, np.integer, np.floating)) and not isinstance(tolerance, bool):
+        if pd.api.types.is_integer_dtype(lookup[on]):
+            if float(tolerance).is_integer():
+                tolerance = int(tolerance)
+            else:
+                # The largest whole distance within a fractional tolerance
+                tolerance = int(np.floor(tolerance))
+        elif pd.api.types.is_float_dtype(lookup[on]):
+            tolerance = float(tolerance)
+    has_value = main[on].notna()
+    # merge_asof needs both sides sorted on the match column and no missing values
+    left = main[has_value].sort_values(on, kind='mergesort')
+
+    merged = pd.merge_asof(
+        left, lookup, on=on, by=by or None, direction=direction,
+        tolerance=tolerance, suffixes=('_x', '_y')
+    )
+    if join_type == 'left' and not has_value.all():
+        merged = pd.concat([merged, main[~has_value]], ignore_index=True)
+    if join_type == 'inner':
+        merged = merged[merged[matched_flag].notna()]
+
+    merged = merged.sort_values(row_id, kind='mergesort')
+    return merged.drop(columns=[row_id, matched_flag]).reset_index(drop=True)
+
+class LookupIndex:
+    """
+    Index over a lookup table's key columns, built once and probed by any
+    number of main tables (e.g. the chunks of a large file).
+
+    Each key column is factorized, with missing values getting a code of
+    their own, so NaN matches NaN exactly as in pd.merge. The per-column
+    codes are combined into one dense group id per distinct key row, and the
+    lookup rows are kept sorted by group, so a probe only has to look up the
+    main table's key values.
+    """
+
+    def __init__(self, df2, key):
+        self.key = list(key)
+        self.values = df2.drop(columns=self.key).reset_index(drop=True)
+        self.columns = []  # Per key column: (distinct non-missing values, code of missing values or -1)
+        self.steps = []  # Per key column: (column size, sorted combined codes) to map codes to group ids
+        groups = np.zeros(len(df2), dtype=np.int64)
+        for col in self.key:
+            codes, uniques = pd.factorize(df2[col])
+            na_code = len(uniques) if (codes == -1).any() else -1
+            codes = np.where(codes == -1, len(uniques), codes).astype(np.int64)
+            size = len(uniques) + 1
+            # Renumber after every column, so the combined codes never outgrow int64
+            step_codes, groups = np.unique(groups * size + codes, return_inverse=True)
+            groups = groups.reshape(-1).astype(np.int64)
+            self.columns.append((pd.Index(uniques), na_code))
+            self.steps.append((size, step_codes))
+        self.order = np.argsort(groups, kind='stable')  # Lookup rows grouped, in their original order
+        self.counts = np.bincount(groups, minlength=len(self.steps[-1][1]) if self.steps else 0)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)[:-1]]).astype(np.int64)
+
+    def groups(self, df1):
+        """
+        Group id of each df1 row's key values, -1 where the lookup table has no such key.
+        """
+        groups = np.zeros(len(df1), dtype=np.int64)
+        found = np.ones(len(df1), dtype=bool)
+        for col, (uniques, na_code), (size, step_codes) in zip(self.key, self.columns, self.steps):
+            values = df1[col]
+            codes = uniques.get_indexer(values).astype(np.int64)
+            missing = values.isna().to_numpy()
+            codes[missing] = na_code
+            found &= codes >= 0
+            combined = groups * size + np.where(codes >= 0, codes, 0)
+            positions = np.minimum(np.searchsorted(step_codes, combined), len(step_codes) - 1)
+            found &= step_codes[positions] == combined
+            groups = np.where(found, positions, 0)
+        return np.where(found, groups, -1)
+
+    def merge(self, df1, how='left', columns=None):
+        """
+        pd.merge(df1, lookup, on=key, how=how) for a 'left' or 'inner' join,
+        using the prebuilt index; `columns` limits the non-key lookup columns
+        returned. Returns (merged, lookup_rows): lookup_rows holds the
+        lookup-table row of each output row (-1 where none matched).
+        """
+        groups = self.groups(df1)
+        counts = np.where(groups >= 0, self.counts[np.maximum(groups, 0)], 0)
+        if how == 'left':
+            repeats = np.maximum(counts, 1)
+        elif how == 'inner':
+            repeats = counts
+        else:
+            raise ValueError(f"LookupIndex.merge only supports left and inner joins, not {how!r}")
+
+        main_rows = np.repeat(np.arange(len(df1)), repeats)
+        # Position of each output row within its group of lookup rows
+        within = np.arange(len(main_rows)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        row_groups = groups[main_rows]
+        hit = row_groups >= 0
+        lookup_rows = np.full(len(main_rows), -1, dtype=np.int64)
+        lookup_rows[hit] = self.order[self.offsets[row_groups[hit]] + within[hit]]
+
+        # Same column names as pd.merge: overlapping non-key columns get _x / _y
+        values = self.values[columns] if columns is not None else self.values
+        overlap = [c for c in values.columns if c in df1.columns]
+        left = df1.iloc[main_rows].reset_index(drop=True).rename(columns={c: f"{c}_x" for c in overlap})
+        if (lookup_rows < 0).any():
+            right = values.reindex(lookup_rows)  # Unmatched rows come back empty, as in pd.merge
+        else:
+            right = values.iloc[lookup_rows]
+        right = right.reset_index(drop=True).rename(columns={c: f"{c}_y" for c in overlap})
+        return pd.concat([left, right], axis=1), lookup_rows
+
+def iter_table_chunks(path, chunksize):
+    """
+    Yields a file as DataFrames of at most `chunksize` rows without loading it
+    all at once. Supports CSV, Parquet, Feather and XLSX (read-only streaming).
+    """
+    lower = path.lower()
+    if lower.endswith('.csv'):
+        yield from pd.read_csv(path, chunksize=chunksize)
+    elif lower.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif lower.endswith(('.feather', '.arrow')):
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for start in range(0, batch.num_rows, chunksize):
+                    yield batch.slice(start, chunksize).to_pandas()
+    elif lower.endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = list(next(rows))
+            buffer = []
+            for row in rows:
+                buffer.append(row)
+                if len(buffer) >= chunksize:
+                    yield pd.DataFrame(buffer, columns=header)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=header)
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Chunked mode does not support this file type: {path}")
+
+class _ChunkAppender:
+    """
+    Appends DataFrame chunks to a CSV or Parquet output file.
+    For Parquet, the column types are fixed by the first chunk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet_writer = None
+        self.started = False
+
+    def write(self, df):
+        if self.path.lower().endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self.parquet_writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self.parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(df, schema=self.parquet_writer.schema, preserve_index=False)
+            self.parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='a' if self.started else 'w', header=not self.started, index=False)
+        self.started = True
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+def _align_key_dtypes(chunk, lookup, key):
+    """
+    Chunks are typed independently (e.g. an all-empty key chunk comes back as
+    float), so cast the chunk's key columns to the lookup table's types where possible.
+    """
+    for col in key:
+        if chunk[col].dtype != lookup[col].dtype:
+            try:
+                chunk[col] = chunk[col].astype(lookup[col].dtype)
+            except (TypeError, ValueError):
+                pass
+
+def super_vlookup_chunked(main_path, df2, key, output_path, columns_to_return=None, join_type='left',
+                          soft_match=False, threshold=90, chunksize=100_000, fuzzy_blocking=True,
+                          workers=-1, match_cache=None, fuzzy_columns=None, fuzzy_scorers=None, timings=None):
+    """
+    Out-of-core super_vlookup for main tables larger than RAM.
+
+    The main table is streamed from `main_path` in chunks of `chunksize` rows.
+    The lookup table's key index (a LookupIndex, where missing key values
+    match as in pd.merge) and, for fuzzy matching, its block index are built
+    once. Each chunk is fuzzy-matched (if requested), joined through the
+    index and appended to `output_path` (CSV or Parquet). Peak memory is
+    bounded by the chunk size plus the lookup table.
+
+    For 'right' and 'outer' joins, lookup rows that no chunk matched are
+    appended at the end, so rows come out in main-table order rather than
+    lookup-table order.
+
+    Args:
+        main_path (str): Main table file (CSV, Parquet or XLSX).
+        df2 (DataFrame): The lookup table.
+        output_path (str): Output file (.csv or .parquet).
+        chunksize (int): Number of main-table rows per chunk.
+        timings (StageTimer, optional): Records the load, match, merge and
+            write time, each added up over all chunks.
+        Other arguments are the same as super_vlookup().
+
+    Returns:
+        int: Number of rows written.
+    """
+    if columns_to_return:
+        df2 = df2[key + columns_to_return]
+    timings = timings or StageTimer()
+    with timings.stage('merge'):
+        index = LookupIndex(df2, key)
+    matcher = None
+    if soft_match:
+        with timings.stage('match'):
+            matcher = SoftMatcher(df2, key, threshold, fuzzy_blocking, workers, match_cache,
+                                  fuzzy_columns, fuzzy_scorers)
+    lookup_matched = np.zeros(len(df2), dtype=bool)
+    chunk_how = 'inner' if join_type in ('inner', 'right') else 'left'
+
+    writer = _ChunkAppender(output_path)
+    rows_written = 0
+    output_columns = None
+    main_columns = None
+    try:
+        chunks = iter_table_chunks(main_path, chunksize)
+        while True:
+            with timings.stage('load'):
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                _align_key_dtypes(chunk, df2, key)
+            if matcher:
+                with timings.stage('match'):
+                    matcher.apply(chunk)
+            with timings.stage('merge'):
+                merged, lookup_rows = index.merge(chunk, chunk_how)
+                lookup_matched[lookup_rows[lookup_rows >= 0]] = True
+            if output_columns is None:
+                output_columns = merged.columns
+                main_columns = chunk.columns
+            with timings.stage('write'):
+                writer.write(merged)
+            rows_written += len(merged)
+
+        if join_type in ('right', 'outer') and not lookup_matched.all():
+            # Lookup rows no chunk matched, with empty main-table columns
+            unmatched = df2[~lookup_matched]
+            if output_columns is not None:
+                overlap = [c for c in unmatched.columns if c in main_columns and c not in key]
+                unmatched = unmatched.rename(columns={c: f"{c}_y" for c in overlap})
+                unmatched = unmatched.reindex(columns=output_columns)
+            with timings.stage('write'):
+                writer.write(unmatched)
+            rows_written += len(unmatched)
+    finally:
+        with timings.stage('write'):
+            writer.close()
+    return rows_written
+
 def main():
+    """
+    Interactive version: asks for everything through Tkinter dialogs.
+    """
+    # Imported here so the CLI also works on headless servers without Tk
+    from tkinter import Tk, filedialog, messagebox, simpledialog
+
     root = Tk()
     root.withdraw()  # Hide the main Tkinter window
 
     try:
         # Prompt user to select the first file
         messagebox.showinfo("Select File", "Please select the main table file.")
-        file1 = filedialog.askopenfilename(filetypes=[("CSV and Excel files", "*.csv *.xlsx")])
+        file1 = filedialog.askopenfilename(filetypes=[("Table files", " ".join(f"*{ext}" for ext in TABLE_FILE_TYPES))])
         if not file1:
             raise ValueError("No file selected for the main table.")
 
         # Prompt user to select the second file
         messagebox.showinfo("Select File", "Please select the lookup table file.")
-        file2 = filedialog.askopenfilename(filetypes=[("CSV and Excel files", "*.csv *.xlsx")])
+        file2 = filedialog.askopenfilename(filetypes=[("Table files", " ".join(f"*{ext}" for ext in TABLE_FILE_TYPES))])
         if not file2:
             raise ValueError("No file selected for the lookup table.")
 
         # Load the data
-        df1 = pd.read_csv(file1) if file1.endswith('.csv') else pd.read_excel(file1)
-        df2 = pd.read_csv(file2) if file2.endswith('.csv') else pd.read_excel(file2)
+        df1 = read_table(file1)
+        df2 = read_table(file2)
 
         # Prompt for merge key columns
         key = simpledialog.askstring(
@@ -88,26 +1000,136 @@ def main():
             ) or 90
 
         # Perform the merge
-        result_df = super_vlookup(df1, df2, key, columns_to_return, join_type, soft_match, threshold)
+        result_df = super_vlookup(df1, df2, key, columns_to_return, join_type, soft_match, threshold,
+                                  match_cache=DEFAULT_MATCH_CACHE_PATH)
 
         # Prompt for output file
         output = filedialog.asksaveasfilename(
             defaultextension=".csv", 
-            filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx")]
+            filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx"),
+                       ("Parquet files", "*.parquet"), ("Feather files", "*.feather")]
         )
         if not output:
             raise ValueError("No output file specified.")
 
         # Save the output
-        if output.endswith('.csv'):
-            result_df.to_csv(output, index=False)
-        else:
-            result_df.to_excel(output, index=False)
+        write_table(result_df, output)
 
         messagebox.showinfo("Success", f"Results saved to {output}")
 
     except Exception as e:
         messagebox.showerror("Error", str(e))
 
+def _split_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+def _split_mapping(value, cast=str):
+    """
+    Parses "Company:3,City:1" into {"Company": 3, "City": 1}.
+    Raises ValueError for items that are not "column:setting".
+    """
+    if not value:
+        return None
+    mapping = {}
+    for item in _split_list(value):
+        name, separator, setting = item.rpartition(':')
+        if not separator or not name.strip() or not setting.strip():
+            raise ValueError(f"expected column:setting, got {item!r}")
+        try:
+            mapping[name.strip()] = cast(setting.strip())
+        except ValueError:
+            raise ValueError(f"invalid setting in {item!r}") from None
+    return mapping
+
+def cli(argv=None):
+    """
+    Headless command-line version of the lookup, with per-stage timings.
+    """
+    parser = argparse.ArgumentParser(
+        description="VLOOKUP-style join of two tables (CSV, XLSX, Parquet or Feather) with optional fuzzy matching."
+    )
+    parser.add_argument("main", help="Main table file")
+    parser.add_argument("lookup", help="Lookup table file")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.csv, .xlsx, .parquet or .feather)")
+    parser.add_argument("-k", "--key", help="Column(s) to merge on, comma-separated "
+                                              "(with --range-key: columns that must match exactly)")
+    parser.add_argument("-c", "--columns", help="Lookup columns to return, comma-separated (default: all)")
+    parser.add_argument("-j", "--join", default="left", choices=["left", "right", "outer", "inner"])
+    parser.add_argument("--soft-match", action="store_true", help="Use fuzzy matching")
+    parser.add_argument("--threshold", type=int, default=90, help="Fuzzy match threshold (0-100)")
+    parser.add_argument("--fuzzy-columns", help='Fuzzy key columns with weights, e.g. "Company:3,City:1"')
+    parser.add_argument("--scorers", help='rapidfuzz scorer per column, e.g. "Company:token_sort_ratio"')
+    parser.add_argument("--no-blocking", action="store_true", help="Score every lookup key (slower, exhaustive)")
+    parser.add_argument("--workers", type=int, default=-1, help="Fuzzy scoring threads (-1 = all cores)")
+    parser.add_argument("--cache", default=DEFAULT_MATCH_CACHE_PATH, help="Fuzzy match cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the fuzzy match cache")
+    parser.add_argument("--range-key", help="Approximate-match (VLOOKUP TRUE) column, e.g. an amount or date")
+    parser.add_argument("--direction", default="backward", choices=["backward", "forward", "nearest"],
+                        help="Range lookup direction (backward = largest lookup value <= main value)")
+    parser.add_argument("--tolerance", help="Range lookup maximum distance, a number or a duration like 7D")
+    parser.add_argument("--chunksize", type=int,
+                        help="Stream the main table in chunks of this many rows (for tables larger than RAM)")
+    args = parser.parse_args(argv)
+    if not args.key and not args.range_key:
+        parser.error("--key or --range-key is required")
+    if args.range_key and args.chunksize:
+        parser.error("--chunksize is not supported with --range-key (range lookups need the whole main table)")
+
+    key = _split_list(args.key) or []
+    columns_to_return = _split_list(args.columns)
+    try:
+        fuzzy_columns = _split_mapping(args.fuzzy_columns, float)
+        fuzzy_scorers = _split_mapping(args.scorers)
+    except ValueError as e:
+        parser.error(f"--fuzzy-columns/--scorers: {e}")
+    options = dict(
+        soft_match=args.soft_match, threshold=args.threshold, fuzzy_blocking=not args.no_blocking,
+        workers=args.workers, match_cache=None if args.no_cache else args.cache,
+        fuzzy_columns=fuzzy_columns, fuzzy_scorers=fuzzy_scorers,
+    )
+    timings = StageTimer()
+
+    with timings.stage('load'):
+        lookup_key = key + [args.range_key] if args.range_key else key
+        lookup_columns = lookup_key + columns_to_return if columns_to_return else None
+        df2 = read_table(args.lookup, columns=lookup_columns)
+
+    if args.range_key:
+        tolerance = None
+        if args.tolerance:
+            try:
+                tolerance = int(args.tolerance)
+            except ValueError:
+                try:
+                    tolerance = float(args.tolerance)
+                except ValueError:
+                    tolerance = pd.Timedelta(args.tolerance)
+        with timings.stage('load'):
+            df1 = read_table(args.main)
+        with timings.stage('merge'):
+            result_df = super_vlookup_range(df1, df2, args.range_key, key, columns_to_return,
+                                            args.direction, tolerance, args.join)
+        with timings.stage('write'):
+            write_table(result_df, args.output)
+        rows = len(result_df)
+    elif args.chunksize:
+        # Load, match, merge and write are interleaved chunk by chunk; each stage's time is added up
+        rows = super_vlookup_chunked(args.main, df2, key, args.output, columns_to_return,
+                                     args.join, chunksize=args.chunksize, timings=timings, **options)
+    else:
+        with timings.stage('load'):
+            df1 = read_table(args.main)
+        result_df = super_vlookup(df1, df2, key, columns_to_return, args.join, timings=timings, **options)
+        with timings.stage('write'):
+            write_table(result_df, args.output)
+        rows = len(result_df)
+
+    print(f"Wrote {rows} rows to {args.output}")
+    print(timings.report())
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # With arguments run headless, otherwise fall back to the Tkinter dialogs
+    if len(sys.argv) > 1:
+        cli()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from superVLOOKUP import LookupIndex, super_vlookup, super_vlookup_chunked
+
+def make_tables(seed=0, rows=400):
+    """
+    Main and lookup tables on a composite key where both sides have missing key values.
+    """
+    rng = np.random.default_rng(seed)
+    regions = np.array(["east", "west", "north", None], dtype=object)
+    main = pd.DataFrame({
+        "Region": regions[rng.integers(0, 4, rows)],
+        "Code": rng.integers(0, 12, rows).astype(float),
+        "Amount": rng.integers(0, 1000, rows),
+    })
+    main.loc[rng.random(rows) < 0.1, "Code"] = np.nan
+    lookup = pd.DataFrame({
+        "Region": regions[rng.integers(0, 4, 60)],
+        "Code": rng.integers(0, 15, 60).astype(float),
+        "Owner": [f"owner{i}" for i in range(60)],
+        "Amount": rng.integers(0, 1000, 60),  # Overlapping non-key column gets suffixes
+    })
+    lookup.loc[rng.random(60) < 0.15, "Code"] = np.nan
+    return main, lookup
+
+def sorted_frame(df):
+    return df.sort_values(list(df.columns), na_position="last").reset_index(drop=True)
+
+@pytest.mark.parametrize("join_type", ["left", "inner", "right", "outer"])
+@pytest.mark.parametrize("chunksize", [7, 64, 1000])
+def test_chunked_matches_in_memory_with_missing_keys(tmp_path, join_type, chunksize):
+    main, lookup = make_tables()
+    main_path = tmp_path / "main.csv"
+    output_path = tmp_path / "out.csv"
+    main.to_csv(main_path, index=False)
+    key = ["Region", "Code"]
+
+    expected_path = tmp_path / "expected.csv"
+    super_vlookup(pd.read_csv(main_path), lookup, key, join_type=join_type).to_csv(expected_path, index=False)
+    rows = super_vlookup_chunked(str(main_path), lookup, key, str(output_path),
+                                 join_type=join_type, chunksize=chunksize)
+
+    expected = pd.read_csv(expected_path)
+    result = pd.read_csv(output_path)
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(sorted_frame(result), sorted_frame(expected))
+
+@pytest.mark.parametrize("join_type", ["left", "inner"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_lookup_index_matches_pd_merge(join_type, seed):
+    main, lookup = make_tables(seed)
+    lookup = pd.concat([lookup, lookup.iloc[:10]], ignore_index=True)  # Duplicate lookup keys fan out
+    index = LookupIndex(lookup, ["Region", "Code"])
+    expected = pd.merge(main, lookup, on=["Region", "Code"], how=join_type)
+    for start in range(0, len(main), 150):
+        chunk = main.iloc[start:start + 150]
+        merged, _ = index.merge(chunk, join_type)
+        pd.testing.assert_frame_equal(
+            merged, pd.merge(chunk, lookup, on=["Region", "Code"], how=join_type).reset_index(drop=True)
+        )
+    assert len(index.merge(main, join_type)[0]) == len(expected)
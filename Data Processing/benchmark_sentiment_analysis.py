@@ -0,0 +1,81 @@
+"""
+Benchmark: Row-by-Row vs. Batched Sentiment Scoring
+---------------------------------------------------
+Generates synthetic survey feedback, scores it with the row-by-row loop
+(add_sentiment_loop) and the batched process-pool path (add_sentiment)
+from SentimentAnalysis.py, checks that both give identical polarity and
+labels (and identical CSV output), and prints rows/sec for each.
+
+Dependencies:
+    pip install pandas numpy textblob
+
+Usage:
+    python benchmark_sentiment_analysis.py --rows 200000 --workers 8
+"""
+
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from SentimentAnalysis import add_sentiment, add_sentiment_loop
+
+OPENERS = ["", "Honestly, ", "Overall ", "I think ", "The webinar was ", "Support was ", "Not bad: "]
+PHRASES = ["great", "very helpful", "too long", "not useful at all", "excellent speakers", "okay",
+           "terrible audio", "really enjoyed it", "confusing signup", "would recommend", "boring",
+           "the best session so far", "slow and frustrating", "fine", "amazing content"]
+CANNED = ["N/A", "Great!", "Good", "", "No comments", "Thanks"]
+
+def generate_feedback(num_rows, seed=42):
+    """
+    Builds a feedback column with free-text answers, frequent canned answers
+    (as real surveys have), blanks and a few non-string values.
+    """
+    rng = random.Random(seed)
+    feedback = []
+    for i in range(num_rows):
+        roll = rng.random()
+        if roll < 0.3:
+            feedback.append(rng.choice(CANNED))
+        elif roll < 0.32:
+            feedback.append(rng.choice([None, 5, 3.5]))
+        else:
+            parts = rng.sample(PHRASES, rng.randint(1, 3))
+            feedback.append(f"{rng.choice(OPENERS)}{', '.join(parts)}. Session {i % 997}.")
+    return feedback
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentiment scoring engines.")
+    parser.add_argument("--rows", type=int, default=50_000, help="Number of synthetic rows")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--workers", type=int, help="Worker processes for the batched path")
+    parser.add_argument("--chunksize", type=int, default=5_000, help="Texts per batch")
+    args = parser.parse_args()
+
+    feedback = generate_feedback(args.rows, args.seed)
+    loop_df = pd.DataFrame({"Feedback": pd.Series(feedback, dtype=object)})
+    batch_df = loop_df.copy()
+
+    start = time.perf_counter()
+    add_sentiment_loop(loop_df)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    add_sentiment(batch_df, workers=args.workers, chunksize=args.chunksize)
+    batch_seconds = time.perf_counter() - start
+
+    identical = (
+        loop_df["Polarity"].astype(float).equals(batch_df["Polarity"])
+        and loop_df["SentimentLabel"].tolist() == batch_df["SentimentLabel"].tolist()
+        and loop_df.to_csv(index=False) == batch_df.to_csv(index=False)
+    )
+
+    print(f"Rows:                {args.rows:,}")
+    print(f"Row-by-row loop:     {loop_seconds:.3f}s  ({args.rows / loop_seconds:,.0f} rows/sec)")
+    print(f"Batched engine:      {batch_seconds:.3f}s  ({args.rows / batch_seconds:,.0f} rows/sec)")
+    print(f"Speed-up:            {loop_seconds / batch_seconds:.1f}x")
+    print(f"Identical output:    {'Yes' if identical else 'NO'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Fake Confluence REST Server
+---------------------------
+A local stand-in for the Confluence REST API, for load-testing
+confluenceToDatabase.py without touching a real wiki.
+
+Serves a seeded, randomly generated corpus of pages, blog posts and users:
+    GET /content          ?spaceKey=&type=&start=&limit=&expand=
+    GET /content/search   ?cql=&start=&limit=&expand=
+    GET /user             ?start=&limit=
+
+Like the real API it caps the page size, only includes the fields named in
+`expand`, links to the next page with `_links.next`, adds latency to each
+response, and answers 429 with a Retry-After header once clients go over a
+request quota. The same seed always produces the same corpus.
+
+Dependencies:
+    None (standard library only)
+
+Usage:
+    python fake_confluence_server.py --port 8090 --spaces 2 --pages 5000 --latency-ms 80 --rate-limit 20
+    Then point the extractor at it:
+    CONFLUENCE_BASE_URL=http://127.0.0.1:8090 CONFLUENCE_DB_URL=sqlite:///confluence.db python confluenceToDatabase.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = ("the quarterly roadmap release customer onboarding pipeline metrics review migration "
+         "budget incident postmortem owner action item deadline campaign dashboard sync api "
+         "integration rollout feedback survey team workshop policy access approval vendor "
+         "contract forecast retention churn launch backlog sprint design spec draft final").split()
+FIRST_NAMES = ["Ana", "Ben", "Chloe", "Dev", "Emma", "Femi", "Greta", "Hiro", "Ines", "Jon"]
+LAST_NAMES = ["Smith", "Nguyen", "Okafor", "Berg", "Costa", "Ito", "Khan", "Novak"]
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+# Generate the corpus
+def _sentence(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+
+def _storage_body(rng, size):
+    """
+    Confluence storage-format HTML of roughly `size` characters.
+    """
+    parts = []
+    length = 0
+    while length < size:
+        block = rng.random()
+        if block < 0.15:
+            part = f"<h2>{_sentence(rng)[:-1]}</h2>"
+        elif block < 0.25:
+            items = "".join(f"<li>{_sentence(rng)}</li>" for _ in range(rng.randint(2, 5)))
+            part = f"<ul>{items}</ul>"
+        elif block < 0.3:
+            part = ('<ac:structured-macro ac:name="info"><ac:rich-text-body>'
+                    f"<p>{_sentence(rng)}</p></ac:rich-text-body></ac:structured-macro>")
+        else:
+            part = "<p>" + " ".join(_sentence(rng) for _ in range(rng.randint(2, 6))) + "</p>"
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+def _when(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+class FakeCorpus:
+    """
+    Seeded corpus of users and content. Content items are stored as full API
+    objects (every expandable field filled in); the server trims them to
+    the requested `expand` on the way out.
+    """
+
+    def __init__(self, spaces=2, pages=1000, blogposts=100, users=200, body_size=4000, seed=42):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.space_keys = [f"SPACE{i + 1}" for i in range(spaces)]
+        self.users = [
+            {"type": "known", "username": f"user{i}", "accountId": f"acc-{i:06d}",
+             "displayName": f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"}
+            for i in range(users)
+        ]
+        self.content = []
+        next_id = 100000
+        for space_key in self.space_keys:
+            for content_type, count in (("page", pages), ("blogpost", blogposts)):
+                for _ in range(count):
+                    next_id += 1
+                    self.content.append(self._make_item(str(next_id), space_key, content_type, body_size))
+        self.by_id = {item["id"]: item for item in self.content}
+
+    def _make_item(self, content_id, space_key, content_type, body_size):
+        rng = self.rng
+        modified = EPOCH + timedelta(seconds=rng.randint(0, 4 * 365 * 86400))
+        return {
+            "id": content_id,
+            "type": content_type,
+            "status": "current",
+            "title": _sentence(rng)[:-1][:80],
+            "space": {"key": space_key, "name": space_key.title()},
+            "version": {"number": rng.randint(1, 30), "when": _when(modified),
+                        "by": {"username": rng.choice(self.users)["username"]}},
+            "body": {"storage": {"value": _storage_body(rng, int(rng.expovariate(1 / body_size)) + 200),
+                                 "representation": "storage"}},
+            "metadata": {"labels": {"results": [{"name": rng.choice(WORDS)} for _ in range(rng.randint(0, 3))]}},
+            "children": {
+                "attachment": {"results": [{"id": f"att{content_id}{k}", "title": f"{rng.choice(WORDS)}-{k}.png"}
+                                           for k in range(rng.choice([0, 0, 1, 2, 5]))]},
+                "comment": {"results": [{"id": f"com{content_id}{k}", "body": {"storage": {"value": f"<p>{_sentence(rng)}</p>"}}}
+                                        for k in range(rng.choice([0, 0, 0, 1, 3]))]},
+            },
+            "history": {"contributors": {"users": [{"username": u["username"]}
+                                                   for u in rng.sample(self.users, rng.randint(1, 4))]}},
+            "_links": {"webui": f"/spaces/{space_key}/pages/{content_id}"},
+        }
+
+    def touch(self, fraction, when=None):
+        """
+        Bumps the version of a random `fraction` of the content, as edits
+        would, and returns the ids changed. Their new version time is `when`
+        (default: now).
+        """
+        when = when or datetime.now(timezone.utc)
+        with self.lock:
+            changed = self.rng.sample(self.content, int(len(self.content) * fraction))
+            for item in changed:
+                item["version"] = dict(item["version"], number=item["version"]["number"] + 1, when=_when(when))
+                item["body"]["storage"]["value"] += f"<p>{_sentence(self.rng)}</p>"
+        return [item["id"] for item in changed]
+
+    def select(self, space_key=None, content_type=None, since=None):
+        """
+        Content matching the filters, in a stable order: by id, or by
+        modification time when `since` is given (as a CQL search orders it).
+        """
+        items = [
+            item for item in self.content
+            if (space_key is None or item["space"]["key"] == space_key)
+            and (content_type is None or item["type"] == content_type)
+            and (since is None or item["version"]["when"][:16].replace("T", " ") >= since)
+        ]
+        if since is not None:
+            items.sort(key=lambda item: (item["version"]["when"], item["id"]))
+        return items
+
+# Trim an item to the fields a client asked for
+def expand_item(item, expand):
+    """
+    Returns the item with only the expandable fields listed in `expand`
+    (e.g. "body.storage,version,children.attachment"); the rest are left
+    out, as the real API leaves them out.
+    """
+    requested = {part.strip() for part in expand.split(",") if part.strip()}
+    result = {key: item[key] for key in ("id", "type", "status", "title", "_links")}
+    if "version" in requested:
+        result["version"] = item["version"]
+    if "space" in requested:
+        result["space"] = item["space"]
+    if "metadata" in requested or any(part.startswith("metadata.") for part in requested):
+        result["metadata"] = item["metadata"]
+    if "body.storage" in requested:
+        result["body"] = {"storage": item["body"]["storage"]}
+    children = {kind: item["children"][kind] for kind in ("attachment", "comment") if f"children.{kind}" in requested}
+    if children:
+        result["children"] = children
+    if "history.contributors" in requested:
+        result["history"] = {"contributors": item["history"]["contributors"]}
+    return result
+
+CQL_SPACE = re.compile(r'space\s*=\s*"?([\w-]+)"?')
+CQL_TYPE = re.compile(r'type\s*=\s*"?(\w+)"?')
+CQL_MODIFIED = re.compile(r'lastmodified\s*>=\s*"([^"]+)"')
+
+def parse_cql(cql):
+    """
+    Understands the subset of CQL the extractor sends: space, type and lastmodified >= filters.
+    """
+    space = CQL_SPACE.search(cql)
+    content_type = CQL_TYPE.search(cql)
+    modified = CQL_MODIFIED.search(cql)
+    return (space.group(1) if space else None, content_type.group(1) if content_type else None,
+            modified.group(1) if modified else None)
+
+# Request quota shared by all clients
+class Throttle:
+    """
+    Token bucket of `rate` requests per second (burst of `burst`). A request
+    that finds the bucket empty is refused with the seconds until the next
+    token is available, sent to the client as Retry-After.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def admit(self):
+        """
+        Returns 0 if the request may proceed, else the seconds to wait.
+        """
+        if not self.rate:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+class FakeConfluenceHandler(BaseHTTPRequestHandler):
+    """
+    Serves the corpus attached to the server. Paths are accepted with or
+    without a /wiki/rest/api prefix.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        path = url.path
+        for prefix in ("/wiki/rest/api", "/rest/api"):
+            if path.startswith(prefix):
+                path = path[len(prefix):]
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        server.count("requests")
+
+        wait = server.throttle.admit()
+        if not wait and server.throttle_probability and server.rng.random() < server.throttle_probability:
+            wait = 1.0 / max(server.throttle.rate or 1.0, 1.0)
+        if wait:
+            server.count("throttled")
+            self.send_response(429)
+            self.send_header("Retry-After", f"{wait:.3f}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if server.latency:
+            time.sleep(max(0.0, server.rng.gauss(server.latency, server.latency * 0.25)))
+
+        try:
+            start = int(params.get("start", 0))
+            limit = max(1, min(int(params.get("limit", 25)), server.max_limit))
+        except ValueError:
+            return self._send_json(400, {"statusCode": 400, "message": "start and limit must be integers"})
+
+        if path == "/content":
+            items = server.corpus.select(params.get("spaceKey"), params.get("type", "page"))
+        elif path == "/content/search":
+            items = server.corpus.select(*parse_cql(params.get("cql", "")))
+        elif path == "/user":
+            return self._send_page(server.corpus.users, start, limit, path, lambda user: user)
+        else:
+            return self._send_json(404, {"statusCode": 404, "message": f"No route for {path}"})
+        expand = params.get("expand", "")
+        return self._send_page(items, start, limit, path, lambda item: expand_item(item, expand))
+
+    def _send_page(self, items, start, limit, path, render):
+        results = [render(item) for item in items[start:start + limit]]
+        links = {"base": f"http://{self.server.server_address[0]}:{self.server.server_port}", "context": ""}
+        if start + limit < len(items):
+            links["next"] = f"{path}?start={start + limit}&limit={limit}"
+        self._send_json(200, {"results": results, "start": start, "limit": limit, "size": len(results), "_links": links})
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count("bytes_sent", len(body))
+
+class FakeConfluenceServer(ThreadingHTTPServer):
+    """
+    HTTP server for a FakeCorpus, with latency, page-size cap and request quota.
+    `stats` counts requests, throttled requests and response bytes.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, corpus, latency_ms=50, max_limit=25, rate_limit=0, throttle_probability=0.0, seed=0):
+        super().__init__(address, FakeConfluenceHandler)
+        self.corpus = corpus
+        self.latency = latency_ms / 1000
+        self.max_limit = max_limit
+        self.throttle = Throttle(rate_limit)
+        self.throttle_probability = throttle_probability
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "throttled": 0, "bytes_sent": 0}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_port}"
+
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+def start_server(corpus, host="127.0.0.1", port=0, **options):
+    """
+    Starts a FakeConfluenceServer on a background thread and returns it
+    (port 0 picks a free port; see `base_url`). Stop it with shutdown().
+    """
+    server = FakeConfluenceServer((host, port), corpus, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a fake Confluence REST API for load testing.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8090, help="Port to listen on")
+    parser.add_argument("--spaces", type=int, default=2, help="Number of spaces (SPACE1, SPACE2, ...)")
+    parser.add_argument("--pages", type=int, default=1000, help="Pages per space")
+    parser.add_argument("--blogposts", type=int, default=100, help="Blog posts per space")
+    parser.add_argument("--users", type=int, default=200, help="Number of users")
+    parser.add_argument("--body-size", type=int, default=4000, help="Mean page body size in characters")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the corpus")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean added latency per response")
+    parser.add_argument("--max-limit", type=int, default=25, help="Largest page size the server returns")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="Requests per second before answering 429 (0 = unlimited)")
+    parser.add_argument("--throttle-probability", type=float, default=0.0,
+                        help="Chance of a random 429 on any request")
+    args = parser.parse_args(argv)
+
+    corpus = FakeCorpus(args.spaces, args.pages, args.blogposts, args.users, args.body_size, args.seed)
+    server = FakeConfluenceServer((args.host, args.port), corpus, latency_ms=args.latency_ms,
+                                  max_limit=args.max_limit, rate_limit=args.rate_limit,
+                                  throttle_probability=args.throttle_probability, seed=args.seed)
+    print(f"Serving {len(corpus.content):,} content items in {', '.join(corpus.space_keys)} at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Requests: {server.stats['requests']:,}  throttled: {server.stats['throttled']:,}  "
+              f"bytes sent: {server.stats['bytes_sent']:,}")
+
+if __name__ == "__main__":
+    main()
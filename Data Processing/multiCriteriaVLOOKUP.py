@@ -4,8 +4,8 @@ Script: Multi-Criteria VLOOKUP using Pandas
 ===========================================================
 Purpose:
 --------
-This script automates the process of performing a multi-criteria VLOOKUP in Excel. 
-It reads data from two specified sheets in an Excel file, merges them based on 
+This script automates the process of performing a multi-criteria VLOOKUP in Excel.
+It reads data from two specified sheets in an Excel file, merges them based on
 common columns (criteria), and saves the merged results to a new Excel file.
 
 Key Features:
@@ -15,23 +15,50 @@ Key Features:
 3. Error handling for missing files or columns.
 4. User-friendly feedback and previews at each step.
 5. Easily adaptable for different datasets and merge operations.
+6. The workbook is opened once and every sheet needed is parsed once, with
+   the fastest installed read-only engine (calamine, else openpyxl).
+7. Several lookups can run against the same parsed workbook in one go; each
+   sheet is parsed once, and each lookup sheet's criteria index is built
+   once and shared between lookups.
+8. Importable: call `multi_criteria_vlookup()` or `run_lookups()` from Python.
+9. Optional compaction (`--compact`): the criteria columns are encoded into a
+   single packed integer key and numeric columns are downcast before merging,
+   so large merges hash integers instead of strings and use less memory.
+   Memory before/after and the merge time are reported.
 
 Usage:
 ------
 1. Place the input Excel file in the specified path.
-2. Adjust the file path, sheet names, and merge configuration as needed.
-3. Run the script to generate the merged data and save it to a new file.
+2. Adjust the file path, sheet names, and merge configuration as needed,
+   or pass them on the command line:
+       python multiCriteriaVLOOKUP.py data.xlsx --sheet1 Orders --sheet2 Prices \\
+           --on Region,Product --how left --output merged.xlsx
+3. For several lookups, list them in a JSON (or YAML) spec file and run:
+       python multiCriteriaVLOOKUP.py data.xlsx --spec lookups.json --output merged.xlsx
+   Each spec is an object with "left", "right", "on" and optionally "how",
+   "columns" (lookup columns to bring back), "output_sheet" and "compact".
+   Every lookup is written to its own sheet of the output workbook.
+4. Run the script to generate the merged data and save it to a new file.
 
 Dependencies:
 -------------
 - Python 3.x
 - pandas library (install via `pip install pandas`)
 - openpyxl library (install via `pip install openpyxl` for Excel support)
+- Optional: python-calamine (`pip install python-calamine`) for much faster reading
+- Optional: PyYAML (`pip install pyyaml`) for YAML spec files
 
 ===========================================================
 """
 
-# Import necessary library
+# Import necessary libraries
+import argparse  # Command-line options
+import importlib.util  # Detects optional engines
+import json  # Spec files
+import sys
+import time  # Merge timings
+
+import numpy as np  # Packed integer keys
 import pandas as pd  # pandas is used for data manipulation and analysis
 
 # ===========================
@@ -48,74 +75,443 @@ output_file_path = "multi_criteria_vlookup.xlsx"  # Output file for the merged d
 merge_how = 'left'  # Merge type: 'left', 'right', 'inner', 'outer'
 merge_on = ['Column1', 'Column2']  # Columns used as criteria for merging
 
-# ===========================
-# Step 1: Load Data
-# ===========================
+# Excel limits sheet names to 31 characters
+MAX_SHEET_NAME_LENGTH = 31
 
-try:
-    print(f"Loading data from {input_file_path}...")
-    # Read the specified sheets into pandas DataFrames
-    sheet1 = pd.read_excel(input_file_path, sheet_name=sheet1_name)
-    sheet2 = pd.read_excel(input_file_path, sheet_name=sheet2_name)
-    print(f"Data from '{sheet1_name}' loaded successfully! Here's a preview:")
-    print(sheet1.head())  # Preview the first few rows of Sheet1
-    print(f"\nData from '{sheet2_name}' loaded successfully! Here's a preview:")
-    print(sheet2.head())  # Preview the first few rows of Sheet2
-except FileNotFoundError:
-    print(f"Error: The file '{input_file_path}' was not found. Please check the file path.")
-    exit(1)  # Exit the script if the file is not found
-except ValueError as e:
-    print(f"Error: {e}. Please check that the sheet names are correct.")
-    exit(1)  # Exit if the sheet names are invalid
+# Name of the temporary packed key column used by compact merges
+PACKED_KEY = "__packed_key"
 
 # ===========================
-# Step 2: Merge Data
+# Key Encoding and Compaction
 # ===========================
 
-try:
-    print(f"\nMerging data based on criteria: {merge_on}...")
-    # Perform the merge operation
-    merged_data = pd.merge(
-        sheet1,  # First DataFrame
-        sheet2,  # Second DataFrame
-        how=merge_how,  # Merge type
-        on=merge_on  # Columns to merge on
-    )
-    print("Data merged successfully! Here's a preview of the merged data:")
-    print(merged_data.head())  # Preview the first few rows of the merged data
-except KeyError as e:
-    print(f"Error: Missing required columns for merging - {e}. Please check your merge criteria.")
-    exit(1)  # Exit if the merge columns are not found in both sheets
+def memory_usage(df):
+    """
+    Deep memory usage of a DataFrame in bytes (object strings included).
+    """
+    return int(df.memory_usage(deep=True).sum())
 
-# ===========================
-# Step 3: Save Merged Data
-# ===========================
+def downcast_numeric(df):
+    """
+    Returns a copy of df with integer columns stored in the smallest integer
+    type that holds them and float64 columns stored as float32 where that
+    loses nothing. Values are unchanged.
+    """
+    df = df.copy()
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif series.dtype == np.float64:
+            as_float32 = series.astype(np.float32)
+            if as_float32.astype(np.float64).equals(series):
+                df[col] = as_float32
+    return df
+
+def encode_merge_keys(left, right, on):
+    """
+    Encodes the criteria columns of both sides into one packed int64 key.
+
+    Each column is factorized over the values of both sides together, so the
+    codes are shared, and sorted, so packed keys sort like the original
+    values (outer merges come out in the same order as pd.merge). Missing
+    values get a code of their own, so NaN matches NaN as in pd.merge.
+
+    Returns:
+        (left_key, right_key, uniques): The packed keys as int64 arrays, and
+        the distinct values of each column, for decoding.
+    """
+    codes_left, codes_right, uniques = [], [], []
+    for col in on:
+        combined = pd.concat([left[col], right[col]], ignore_index=True)
+        codes, col_uniques = pd.factorize(combined, sort=True, use_na_sentinel=False)
+        codes_left.append(codes[:len(left)].astype(np.int64))
+        codes_right.append(codes[len(left):].astype(np.int64))
+        uniques.append(col_uniques)
+
+    if np.prod([float(len(u)) for u in uniques]) >= 2 ** 63:
+        raise OverflowError("Too many distinct criteria values to pack into one 64-bit key.")
+
+    # Mixed-radix packing, first column most significant
+    left_key = np.zeros(len(left), dtype=np.int64)
+    right_key = np.zeros(len(right), dtype=np.int64)
+    for col_left, col_right, col_uniques in zip(codes_left, codes_right, uniques):
+        left_key = left_key * len(col_uniques) + col_left
+        right_key = right_key * len(col_uniques) + col_right
+    return left_key, right_key, uniques
+
+def decode_merge_keys(packed, on, uniques):
+    """
+    Turns packed keys back into the original criteria columns.
+    """
+    columns = {}
+    for col, col_uniques in zip(reversed(on), reversed(uniques)):
+        columns[col] = col_uniques.take(packed % len(col_uniques))
+        packed = packed // len(col_uniques)
+    return {col: columns[col] for col in on}
+
+class KeyIndex:
+    """
+    Index over a lookup sheet's criteria columns, built once and reused by
+    every left or inner lookup against the same sheet and criteria.
+
+    Each criteria column is factorized, with missing values getting a code
+    of their own, so NaN matches NaN as in pd.merge. The codes are combined
+    into one dense group id per distinct criteria row and the sheet's rows
+    are kept sorted by group, so a lookup only has to find the main sheet's
+    values in the index.
+    """
 
-try:
-    print(f"\nSaving merged data to {output_file_path}...")
-    # Save the merged data to an Excel file
-    merged_data.to_excel(output_file_path, index=False)
-    print(f"Merged data successfully saved as '{output_file_path}'!")
-except Exception as e:
-    print(f"Error while saving the file: {e}")
-    exit(1)  # Exit if an error occurs during file saving
+    def __init__(self, right, on):
+        self.on = list(on)
+        self.values = right.drop(columns=self.on).reset_index(drop=True)
+        self.columns = []  # Per criteria column: (distinct non-missing values, code of missing values or -1)
+        self.steps = []  # Per criteria column: (column size, sorted combined codes)
+        groups = np.zeros(len(right), dtype=np.int64)
+        for col in self.on:
+            codes, uniques = pd.factorize(right[col])
+            na_code = len(uniques) if (codes == -1).any() else -1
+            codes = np.where(codes == -1, len(uniques), codes).astype(np.int64)
+            size = len(uniques) + 1
+            # Renumbered after every column, so the combined codes never outgrow int64
+            step_codes, groups = np.unique(groups * size + codes, return_inverse=True)
+            groups = groups.reshape(-1).astype(np.int64)
+            self.columns.append((pd.Index(uniques), na_code))
+            self.steps.append((size, step_codes))
+        self.order = np.argsort(groups, kind="stable")
+        self.counts = np.bincount(groups, minlength=len(self.steps[-1][1]) if self.steps else 0)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)[:-1]]).astype(np.int64)
+
+    def groups(self, left):
+        """
+        Group id of each left row's criteria values, -1 where the lookup sheet has none.
+        """
+        groups = np.zeros(len(left), dtype=np.int64)
+        found = np.ones(len(left), dtype=bool)
+        for col, (uniques, na_code), (size, step_codes) in zip(self.on, self.columns, self.steps):
+            codes = uniques.get_indexer(left[col]).astype(np.int64)
+            codes[left[col].isna().to_numpy()] = na_code
+            found &= codes >= 0
+            combined = groups * size + np.where(codes >= 0, codes, 0)
+            positions = np.minimum(np.searchsorted(step_codes, combined), len(step_codes) - 1)
+            found &= step_codes[positions] == combined
+            groups = np.where(found, positions, 0)
+        return np.where(found, groups, -1)
+
+    def merge(self, left, how="left", columns=None):
+        """
+        Same result as pd.merge(left, <indexed sheet>, on=on, how=how) for
+        'left' and 'inner'; `columns` limits the lookup columns returned.
+        """
+        groups = self.groups(left)
+        counts = np.where(groups >= 0, self.counts[np.maximum(groups, 0)], 0)
+        repeats = np.maximum(counts, 1) if how == "left" else counts
+        left_rows = np.repeat(np.arange(len(left)), repeats)
+        # Position of each output row within its group of lookup rows
+        within = np.arange(len(left_rows)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        row_groups = groups[left_rows]
+        hit = row_groups >= 0
+        right_rows = np.full(len(left_rows), -1, dtype=np.int64)
+        right_rows[hit] = self.order[self.offsets[row_groups[hit]] + within[hit]]
+
+        # Same column names as pd.merge: overlapping non-criteria columns get _x / _y
+        values = self.values[columns] if columns is not None else self.values
+        overlap = [col for col in values.columns if col in left.columns]
+        left_part = left.iloc[left_rows].reset_index(drop=True).rename(columns={c: f"{c}_x" for c in overlap})
+        right_part = values.reindex(right_rows) if (~hit).any() else values.iloc[right_rows]
+        right_part = right_part.reset_index(drop=True).rename(columns={c: f"{c}_y" for c in overlap})
+        return pd.concat([left_part, right_part], axis=1)
+
+def compact_merge(left, right, on, how='left', stats=None):
+    """
+    pd.merge(left, right, on=on, how=how) on a packed integer key with
+    downcast numeric columns. The rows and values are the same as the plain
+    merge; numeric columns may come back in smaller types.
+
+    Args:
+        stats (dict, optional): Filled with 'memory_before', 'memory_after'
+            (bytes, both sides) and 'merge_seconds'.
+    """
+    on = list(on)
+    memory_before = memory_usage(left) + memory_usage(right)
+    left_key, right_key, uniques = encode_merge_keys(left, right, on)
+    key_positions = sorted((left.columns.get_loc(col), col) for col in on)
+    # Both sides only carry the packed key; the criteria columns are decoded after the merge
+    left = downcast_numeric(left.drop(columns=on))
+    right = downcast_numeric(right.drop(columns=on))
+    left[PACKED_KEY] = left_key
+    right[PACKED_KEY] = right_key
+    memory_after = memory_usage(left) + memory_usage(right)
+
+    start = time.perf_counter()
+    merged = pd.merge(left, right, on=PACKED_KEY, how=how)
+    merge_seconds = time.perf_counter() - start
+
+    decoded = decode_merge_keys(merged.pop(PACKED_KEY).to_numpy(), on, uniques)
+    for position, col in key_positions:
+        merged.insert(position, col, decoded[col])
+
+    if stats is not None:
+        stats.update(memory_before=memory_before, memory_after=memory_after, merge_seconds=merge_seconds)
+    return merged
 
 # ===========================
-# Summary of Execution
+# Workbook Loading and Lookups
 # ===========================
 
-print("\n--- Process Summary ---")
-print(f"Input File: {input_file_path}")
-print(f"Sheet 1: {sheet1_name}")
-print(f"Sheet 2: {sheet2_name}")
-print(f"Output File: {output_file_path}")
-print(f"Merge Type: {merge_how}")
-print(f"Merge Criteria: {merge_on}")
-print("Script execution completed successfully!")
+def excel_engine():
+    """
+    Returns the fastest installed read-only Excel engine: calamine (Rust,
+    streaming) if available, otherwise openpyxl (which pandas opens read-only).
+    """
+    return "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+class SharedWorkbook:
+    """
+    An Excel workbook parsed once. Sheets are parsed on first use and kept,
+    and the criteria index of a lookup sheet (a KeyIndex) is built once per
+    (sheet, criteria) and shared, so any number of lookups cost a single
+    parse of each sheet and a single index of each lookup sheet.
+    """
+
+    def __init__(self, path, sheet_names=None, engine=None):
+        self.path = path
+        self.engine = engine or excel_engine()
+        self._excel = pd.ExcelFile(path, engine=self.engine)
+        self.sheets = {}
+        self._indexes = {}
+        if sheet_names:
+            self.load(sheet_names)
+
+    def load(self, sheet_names):
+        """
+        Parses every sheet in `sheet_names` that is not loaded yet, in one pass over the open file.
+        """
+        missing = [name for name in dict.fromkeys(sheet_names) if name not in self.sheets]
+        unknown = [name for name in missing if name not in self._excel.sheet_names]
+        if unknown:
+            raise ValueError(f"Worksheet(s) not found: {', '.join(map(str, unknown))}")
+        if missing:
+            self.sheets.update(self._excel.parse(sheet_name=missing))
+
+    def sheet(self, name):
+        self.load([name])
+        return self.sheets[name]
+
+    def key_index(self, name, on):
+        """
+        The KeyIndex of sheet `name` over the criteria `on`, built on first use.
+        """
+        index_id = (name, tuple(on))
+        if index_id not in self._indexes:
+            self._indexes[index_id] = KeyIndex(self.sheet(name), on)
+        return self._indexes[index_id]
+
+    def lookup(self, left, right, on, how='left', columns=None, compact=False, stats=None):
+        """
+        Merges sheet `left` with sheet `right` on the columns in `on`. Same
+        result as pd.merge(left, right, on=on, how=how). Left and inner
+        lookups reuse the right sheet's cached KeyIndex; right and outer ones
+        (which keep every lookup row) run pd.merge. With `compact`, the merge
+        runs on a packed integer key (see compact_merge) and `stats` receives
+        its memory and timing figures; when the criteria have too many
+        distinct values to pack, it falls back to the regular merge and
+        `stats` gets a 'compact_skipped' reason.
+        """
+        on = list(on)
+        left_df, right_df = self.sheet(left), self.sheet(right)
+        missing = [col for col in on if col not in left_df.columns or col not in right_df.columns]
+        if missing:
+            raise KeyError(", ".join(map(str, missing)))
+
+        columns = [col for col in columns if col not in on] if columns else None
+        if compact:
+            try:
+                return compact_merge(left_df, right_df[on + columns] if columns else right_df, on, how, stats)
+            except OverflowError as e:
+                if stats is not None:
+                    stats["compact_skipped"] = str(e)
+        if how in ('left', 'inner'):
+            return self.key_index(right, on).merge(left_df, how, columns)
+        if columns:
+            right_df = right_df[on + columns]
+        return pd.merge(left_df, right_df, how=how, on=on)
+
+    def close(self):
+        self._excel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _output_sheet_name(spec, position, used):
+    name = str(spec.get("output_sheet") or f"{spec['left']} + {spec['right']}")[:MAX_SHEET_NAME_LENGTH]
+    if name in used:
+        suffix = f" ({position})"
+        name = name[:MAX_SHEET_NAME_LENGTH - len(suffix)] + suffix
+    used.add(name)
+    return name
+
+def save_results(results, output_file_path):
+    """
+    Writes each merged DataFrame to its own sheet of one Excel file.
+    """
+    with pd.ExcelWriter(output_file_path) as writer:
+        for name, merged in results.items():
+            merged.to_excel(writer, sheet_name=name, index=False)
+
+def run_lookups(input_file_path, lookups, output_file_path=None, engine=None, compact=False, verbose=False):
+    """
+    Runs a list of lookup specs against one parsed workbook.
+
+    Args:
+        input_file_path (str): Excel workbook holding all the sheets.
+        lookups (list): Dicts with "left", "right", "on" and optionally "how"
+            (default 'left'), "columns" and "output_sheet".
+        output_file_path (str, optional): Workbook to write, one sheet per lookup.
+        engine (str, optional): pandas Excel engine. Defaults to excel_engine().
+        compact (bool): Merge on packed integer keys with downcast numerics
+            (a spec's own "compact" entry overrides this).
+        verbose (bool): Print a preview of every sheet and merge result.
+
+    Returns:
+        dict: Output sheet name -> merged DataFrame, in spec order.
+    """
+    sheet_names = [name for spec in lookups for name in (spec["left"], spec["right"])]
+    results = {}
+    used_names = set()
+    with SharedWorkbook(input_file_path, sheet_names, engine) as workbook:
+        if verbose:
+            for name, sheet in workbook.sheets.items():
+                print(f"\nData from '{name}' loaded successfully! Here's a preview:")
+                print(sheet.head())  # Preview the first few rows of each sheet
+        for position, spec in enumerate(lookups, start=1):
+            if verbose:
+                print(f"\nMerging '{spec['left']}' with '{spec['right']}' based on criteria: {spec['on']}...")
+            stats = {}
+            merged = workbook.lookup(spec["left"], spec["right"], spec["on"], spec.get("how", 'left'),
+                                     spec.get("columns"), spec.get("compact", compact), stats)
+            if verbose:
+                if "compact_skipped" in stats:
+                    print(f"Compaction skipped ({stats['compact_skipped']}); used a regular merge instead.")
+                elif stats:
+                    print(f"Compaction: {stats['memory_before'] / 1e6:.1f} MB -> "
+                          f"{stats['memory_after'] / 1e6:.1f} MB, merge took {stats['merge_seconds']:.3f}s")
+                print("Data merged successfully! Here's a preview of the merged data:")
+                print(merged.head())  # Preview the first few rows of the merged data
+            results[_output_sheet_name(spec, position, used_names)] = merged
+
+    if output_file_path:
+        save_results(results, output_file_path)
+    return results
+
+def multi_criteria_vlookup(input_file_path, sheet1_name, sheet2_name, merge_on, merge_how='left',
+                           output_file_path=None, engine=None, compact=False):
+    """
+    Single lookup: merges two sheets of one workbook on several criteria.
+
+    Returns:
+        DataFrame: The merged data (also saved to `output_file_path` if given).
+    """
+    with SharedWorkbook(input_file_path, [sheet1_name, sheet2_name], engine) as workbook:
+        merged_data = workbook.lookup(sheet1_name, sheet2_name, merge_on, merge_how, compact=compact)
+    if output_file_path:
+        merged_data.to_excel(output_file_path, index=False)
+    return merged_data
+
+def load_specs(path):
+    """
+    Reads a list of lookup specs from a JSON or YAML file.
+    """
+    with open(path) as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            import yaml
+            specs = yaml.safe_load(f)
+        else:
+            specs = json.load(f)
+    if isinstance(specs, dict):
+        specs = specs.get("lookups", [])
+    return specs
+
+def _split_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-criteria VLOOKUP between sheets of one Excel workbook.")
+    parser.add_argument("input", nargs="?", default=input_file_path, help="Input Excel workbook")
+    parser.add_argument("--sheet1", default=sheet1_name, help="Main sheet")
+    parser.add_argument("--sheet2", default=sheet2_name, help="Lookup sheet")
+    parser.add_argument("--on", default=",".join(merge_on), help="Criteria columns, comma-separated")
+    parser.add_argument("--how", default=merge_how, choices=["left", "right", "inner", "outer"], help="Merge type")
+    parser.add_argument("--spec", help="JSON/YAML file with a list of lookups to run instead of --sheet1/--sheet2")
+    parser.add_argument("--output", default=output_file_path, help="Output Excel file")
+    parser.add_argument("--engine", help="pandas Excel engine (default: calamine if installed, else openpyxl)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Merge on packed integer keys with downcast numeric columns")
+    args = parser.parse_args(argv)
+
+    if args.spec:
+        lookups = load_specs(args.spec)
+    else:
+        lookups = [{"left": args.sheet1, "right": args.sheet2, "on": _split_list(args.on), "how": args.how}]
+
+    if len(lookups) == 1 and not lookups[0].get("output_sheet"):
+        # A single lookup keeps the original single-sheet output
+        lookups[0] = dict(lookups[0], output_sheet="Sheet1")
+
+    # ===========================
+    # Step 1 & 2: Load and Merge Data
+    # ===========================
+
+    try:
+        print(f"Loading data from {args.input}...")
+        # Opens the workbook once, parses every sheet the lookups need and runs them in order
+        results = run_lookups(args.input, lookups, engine=args.engine, compact=args.compact, verbose=True)
+    except FileNotFoundError:
+        print(f"Error: The file '{args.input}' was not found. Please check the file path.")
+        sys.exit(1)  # Exit the script if the file is not found
+    except ValueError as e:
+        print(f"Error: {e}. Please check that the sheet names are correct.")
+        sys.exit(1)  # Exit if the sheet names are invalid
+    except KeyError as e:
+        print(f"Error: Missing required columns for merging - {e}. Please check your merge criteria.")
+        sys.exit(1)  # Exit if the merge columns are not found in both sheets
+
+    # ===========================
+    # Step 3: Save Merged Data
+    # ===========================
+
+    try:
+        print(f"\nSaving merged data to {args.output}...")
+        # Save every lookup to its own sheet of one Excel file
+        save_results(results, args.output)
+        print(f"Merged data successfully saved as '{args.output}'!")
+    except Exception as e:
+        print(f"Error while saving the file: {e}")
+        sys.exit(1)  # Exit if an error occurs during file saving
+
+    # ===========================
+    # Summary of Execution
+    # ===========================
+
+    print("\n--- Process Summary ---")
+    print(f"Input File: {args.input}")
+    for spec, name in zip(lookups, results):
+        print(f"Lookup '{name}': {spec['left']} + {spec['right']}, "
+              f"Merge Type: {spec.get('how', 'left')}, Merge Criteria: {spec['on']}")
+    print(f"Output File: {args.output}")
+    print("Script execution completed successfully!")
+
+if __name__ == "__main__":
+    main()
 
 # ===========================
 # Additional Notes
 # ===========================
 # - Ensure that the input Excel file and sheets exist.
 # - Modify the `merge_on` and `merge_how` variables for different datasets or merge types.
-# - This script can be extended to handle additional sheets or more complex merge logic.
\ No newline at end of file
+# - Lookups in a spec file share one parse of the workbook, so adding lookups is cheap.
@@ -4,9 +4,9 @@ Script: Excel Pivot Table Generator
 ===========================================================
 Purpose:
 --------
-This script automates the process of generating a pivot table from an Excel dataset. 
-It reads sales data from a specified input file, summarizes the data based on 
-configurable criteria (e.g., region, product, and sales values), and saves the resulting 
+This script automates the process of generating a pivot table from an Excel dataset.
+It reads sales data from a specified input file, summarizes the data based on
+configurable criteria (e.g., region, product, and sales values), and saves the resulting
 pivot table to a new Excel file.
 
 Key Features:
@@ -21,25 +21,78 @@ Key Features:
 3. Error handling to manage file-related issues or missing data.
 4. Clear feedback to the user during each step of execution.
 5. Easily distributable and reusable by adjusting configuration variables.
+6. Spec runner: build many pivots from one read of the data. Only the columns
+   the pivots use are read, pivots with the same index/columns share one
+   groupby, and every pivot is written to its own sheet of one workbook.
+7. Chunked mode (`--chunksize`) for data larger than memory: the input is
+   streamed in chunks and only mergeable per-group totals (sum, count, min,
+   max; mean = sum / count) are kept, so memory depends on the number of
+   distinct groups rather than on the number of rows.
+8. Incremental refresh (`--incremental`, CSV input): the per-group totals are
+   saved next to the output together with how far into the input they go, so
+   the next run only reads and folds in the rows appended since.
+9. Excel inputs are cached as Parquet: the first read converts the workbook,
+   later reads of the unchanged file load only the columns the pivots use
+   from the Parquet copy. The cache is bounded in size (least recently used
+   copies are removed first).
 
 Usage:
 ------
 1. Place the input Excel file in the specified path.
 2. Adjust the file path and pivot table settings as needed.
 3. Run the script to generate the pivot table and save it to a new file.
+4. For many pivots over the same data, list them in a YAML or JSON spec file:
+       - name: Sales by Region
+         values: Sales
+         index: Region
+         columns: Product
+         aggfunc: sum
+         fill_value: 0
+   and run:
+       python pivotTableGenerator.py --spec weekly_pivots.yaml --input sales_data.xlsx --output weekly.xlsx
+   `index`, `columns` and `values` may also be lists. Sheet names are cut to
+   Excel's 31-character limit.
+5. For inputs bigger than memory, add `--chunksize 500000` (CSV, Parquet or
+   Excel input; aggfunc sum, count, min, max or mean).
+6. For a CSV that only ever grows, add `--incremental`: the first run builds
+   the pivots and saves `<output>.state.json` (plus one Parquet file of
+   totals per index/columns combination); later runs only process new
+   rows. If the start of the file or the pivot specs change, the pivots are
+   rebuilt from scratch. A last line without a line break is treated as still
+   being written and is picked up by the next run.
+7. Excel inputs are cached in ~/.cache/pivot_table_generator (up to 2 GB by
+   default). Use `--cache-dir`, `--cache-size-mb` or `--no-cache` to change this.
 
 Dependencies:
 -------------
 - Python 3.x
 - pandas library (install via `pip install pandas`)
 - openpyxl library (install via `pip install openpyxl` for Excel support)
+- Optional: PyYAML (`pip install pyyaml`) for YAML spec files
+- Optional: pyarrow (`pip install pyarrow`) for Parquet input, the Excel cache
+  and `--incremental`
 
 ===========================================================
 """
 
-# Import necessary library
+# Import necessary libraries
+import argparse  # Command-line options
+import contextlib
+import hashlib  # Input and spec fingerprints
+import importlib.util  # Detects optional dependencies
+import io
+import json  # Spec files
+import os
+import sys
+import time  # Cache access times
+
 import pandas as pd  # pandas is used for data manipulation and analysis
 
+try:
+    import fcntl  # Locks the Excel cache index (POSIX only)
+except ImportError:
+    fcntl = None
+
 # ===========================
 # Configuration Section
 # ===========================
@@ -55,72 +108,855 @@ pivot_columns = 'Product'  # Columns in the pivot table (e.g., 'Product', 'Categ
 pivot_aggfunc = 'sum'  # Aggregation function (e.g., 'sum', 'mean', 'count')
 pivot_fill_value = 0  # Value to replace missing data in the pivot table
 
+# Excel limits sheet names to 31 characters
+MAX_SHEET_NAME_LENGTH = 31
+
+# Per-group totals kept by chunked mode for each aggregation function, and how
+# the totals of two chunks combine
+PARTIAL_STATS = {
+    'sum': ['sum'],
+    'count': ['count'],
+    'min': ['min'],
+    'max': ['max'],
+    'mean': ['sum', 'count'],
+}
+COMBINE_STATS = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+# Incremental refresh: state file suffix, and how many bytes at the start of
+# the file and just before the saved offset must be unchanged for the state
+# to be reused
+STATE_SUFFIX = ".state.json"
+STATE_FORMAT = 2
+CHECK_BYTES = 64 * 1024
+READ_BLOCK_SIZE = 1 << 20
+
+# Parquet copies of Excel inputs are kept here, up to this many bytes in total
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pivot_table_generator")
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+
 # ===========================
-# Step 1: Load Excel Data
+# Pivot Engine
 # ===========================
 
-try:
-    print(f"Loading data from {input_file_path}...")
-    # Read the input Excel file into a pandas DataFrame
-    data = pd.read_excel(input_file_path)
-    print("Data loaded successfully! Here are the first few rows of your dataset:")
-    print(data.head())  # Display the first few rows for confirmation
-except FileNotFoundError:
-    print(f"Error: The file '{input_file_path}' was not found. Please check the file path and try again.")
-    exit(1)  # Exit the script with an error code if the file is not found
+def _as_list(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+def normalize_spec(spec, position=1):
+    """
+    Fills in a pivot spec's defaults. Returns a dict with list-valued
+    'index', 'columns' and 'values', plus 'values_multi' (whether `values`
+    was given as a list, which keeps the value name as a column level).
+    """
+    if isinstance(spec.get("aggfunc", "sum"), (list, tuple, dict)):
+        raise ValueError(f"Pivot {spec.get('name', position)}: aggfunc must be a single function name.")
+    values = spec.get("values")
+    if values is None:
+        raise ValueError(f"Pivot {spec.get('name', position)}: 'values' is required.")
+    return {
+        "name": str(spec.get("name") or f"Pivot {position}"),
+        "values": _as_list(values),
+        "values_multi": isinstance(values, (list, tuple)),
+        "index": _as_list(spec.get("index")),
+        "columns": _as_list(spec.get("columns")),
+        "aggfunc": spec.get("aggfunc", "sum"),
+        "fill_value": spec.get("fill_value"),
+    }
+
+def required_columns(specs):
+    """
+    Every column the pivots read, in first-use order.
+    """
+    return list(dict.fromkeys(
+        col for spec in specs for col in spec["index"] + spec["columns"] + spec["values"]
+    ))
+
+def finalize_pivot(agged, index, columns, fill_value=None, values_multi=False):
+    """
+    Turns per-group aggregates (a DataFrame indexed by index + columns, one
+    column per value) into the pivot table pd.pivot_table would return,
+    including its dropna/fill_value handling.
+    """
+    agged = agged.dropna(how="all")
+    table = agged
+    if columns and index:
+        table = agged.unstack(list(range(len(index), len(index) + len(columns))), fill_value=fill_value)
+    table = table.sort_index(axis=1)
+    if fill_value is not None:
+        table = table.fillna(fill_value)
+    if not values_multi and table.columns.nlevels > 1:
+        table.columns = table.columns.droplevel(0)
+    if not index and columns:
+        table = table.T
+    return table.dropna(how="all", axis=1)
+
+def group_specs(specs):
+    """
+    Groups normalized specs by their (index, columns) combination, after
+    checking that pivot names are unique.
+    """
+    names = [spec["name"] for spec in specs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate pivot name(s): {', '.join(duplicates)}")
+
+    groups = {}
+    for spec in specs:
+        groups.setdefault((tuple(spec["index"]), tuple(spec["columns"])), []).append(spec)
+    return groups
+
+def build_pivots(data, specs):
+    """
+    Builds every pivot in `specs` (normalized) from one DataFrame. Pivots
+    with the same index and columns share a single groupby that computes all
+    of their values and aggregation functions at once.
+
+    Returns:
+        dict: Pivot name -> pivot table, in spec order.
+    """
+    tables = {}
+    for (index, columns), group in group_specs(specs).items():
+        keys = list(index + columns)
+        missing = [col for col in keys + required_columns(group) if col not in data.columns]
+        if missing:
+            raise KeyError(", ".join(map(str, dict.fromkeys(missing))))
+        values = list(dict.fromkeys(v for spec in group for v in spec["values"]))
+        funcs = list(dict.fromkeys(spec["aggfunc"] for spec in group))
+        # One pass over the data for every (value, function) pair of this group
+        shared = data.groupby(keys, observed=True, sort=True, dropna=True)[values].agg(funcs)
+        for spec in group:
+            agged = shared[[(v, spec["aggfunc"]) for v in spec["values"]]]
+            agged.columns = spec["values"]
+            tables[spec["name"]] = finalize_pivot(agged, spec["index"], spec["columns"],
+                                                  spec["fill_value"], spec["values_multi"])
+    return {spec["name"]: tables[spec["name"]] for spec in specs}
 
 # ===========================
-# Step 2: Create Pivot Table
+# Chunked (Out-of-Core) Aggregation
 # ===========================
 
-try:
-    print("Creating pivot table...")
-    # Generate the pivot table using the specified configurations
-    pivot_table = pd.pivot_table(
-        data,  # Source data
-        values=pivot_values,  # Data to aggregate
-        index=pivot_index,  # Rows in the pivot table
-        columns=pivot_columns,  # Columns in the pivot table
-        aggfunc=pivot_aggfunc,  # Aggregation function
-        fill_value=pivot_fill_value  # Fill missing data with this value
+def partial_aggregate(chunk, keys, values, stats):
+    """
+    Per-group totals of one chunk: a DataFrame indexed by `keys` with a
+    (value, stat) column for every value and stat.
+    """
+    return chunk.groupby(keys, observed=True, sort=False, dropna=True)[values].agg(stats)
+
+def merge_partials(state, partial):
+    """
+    Folds one chunk's totals into the running totals. Both are small: one row per group.
+    """
+    if state is None:
+        return partial
+    combined = pd.concat([state, partial])
+    return combined.groupby(level=list(range(combined.index.nlevels)), sort=False).agg(
+        {col: COMBINE_STATS[col[1]] for col in combined.columns}
     )
-    print("Pivot table created successfully! Here's a preview:")
-    print(pivot_table.head())  # Display the first few rows of the pivot table
-except KeyError as e:
-    print(f"Error: Missing required column in the data - {e}. Please check your pivot table configuration.")
-    exit(1)  # Exit if required columns are missing
+
+def finalize_partials(state, spec):
+    """
+    Builds one pivot from the running totals, with the same shape and
+    fill_value handling as pd.pivot_table on the full data.
+    """
+    state = state.sort_index()
+    agged = pd.DataFrame(index=state.index)
+    for value in spec["values"]:
+        if spec["aggfunc"] == 'mean':
+            agged[value] = state[(value, 'sum')] / state[(value, 'count')]
+        else:
+            agged[value] = state[(value, spec["aggfunc"])]
+    return finalize_pivot(agged, spec["index"], spec["columns"], spec["fill_value"], spec["values_multi"])
+
+def _check_mergeable(specs):
+    unsupported = sorted({str(spec["aggfunc"]) for spec in specs if spec["aggfunc"] not in PARTIAL_STATS})
+    if unsupported:
+        raise ValueError(f"Chunked mode supports {', '.join(PARTIAL_STATS)} only, not {', '.join(unsupported)}")
+
+def fold_chunks(chunks, specs, states=None):
+    """
+    Folds a stream of DataFrame chunks into per-(index, columns) running
+    totals. Returns the updated states, keyed like group_specs().
+    """
+    groups = group_specs(specs)
+    states = dict(states or {})
+    for chunk in chunks:
+        for group_key, group in groups.items():
+            keys = list(group_key[0] + group_key[1])
+            missing = [col for col in keys + required_columns(group) if col not in chunk.columns]
+            if missing:
+                raise KeyError(", ".join(map(str, dict.fromkeys(missing))))
+            values = list(dict.fromkeys(v for spec in group for v in spec["values"]))
+            stats = list(dict.fromkeys(stat for spec in group for stat in PARTIAL_STATS[spec["aggfunc"]]))
+            states[group_key] = merge_partials(states.get(group_key),
+                                               partial_aggregate(chunk, keys, values, stats))
+    return states
+
+def finalize_states(states, specs):
+    """
+    Builds every pivot from the running totals. Returns pivot name -> table, in spec order.
+    """
+    tables = {}
+    for group_key, group in group_specs(specs).items():
+        for spec in group:
+            tables[spec["name"]] = finalize_partials(states[group_key], spec)
+    return {spec["name"]: tables[spec["name"]] for spec in specs}
+
+def build_pivots_chunked(path, specs, chunksize=500_000, cache=None):
+    """
+    Out-of-core version of build_pivots: streams `path` in chunks of
+    `chunksize` rows and keeps only per-group totals, so memory is bounded by
+    the number of distinct (index, columns) groups. Supports the aggregation
+    functions in PARTIAL_STATS.
+
+    Returns:
+        dict: Pivot name -> pivot table, in spec order.
+    """
+    _check_mergeable(specs)
+    states = fold_chunks(iter_data_chunks(path, required_columns(specs), chunksize, cache), specs)
+    return finalize_states(states, specs)
+
+def _iter_excel_chunks(path, columns, chunksize):
+    """
+    Streams an Excel sheet with openpyxl's read-only mode, chunksize rows at a time.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, []))
+        missing = [col for col in columns if col not in header]
+        if missing:
+            raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+        positions = [header.index(col) for col in columns]
+        batch = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in positions])
+            if len(batch) == chunksize:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+def iter_data_chunks(path, columns, chunksize, cache=None):
+    """
+    Streams the input file (CSV, Parquet or Excel) as DataFrames of at most
+    `chunksize` rows, reading only the given columns. An Excel file with a
+    current copy in `cache` is streamed from that copy.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if cache is not None and extension in EXCEL_EXTENSIONS:
+        path = cache.lookup(path) or path
+        extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+    elif extension == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from _iter_excel_chunks(path, columns, chunksize)
 
 # ===========================
-# Step 3: Save Pivot Table
+# Incremental Refresh
 # ===========================
 
-try:
-    print(f"Saving pivot table to {output_file_path}...")
-    # Save the pivot table to an Excel file
-    pivot_table.to_excel(output_file_path)
-    print(f"Pivot table successfully saved as '{output_file_path}'!")
-except Exception as e:
-    print(f"Error while saving the pivot table: {e}")
-    exit(1)  # Exit if an error occurs during file saving
+def state_path_for(output_path):
+    return output_path + STATE_SUFFIX
+
+def specs_fingerprint(specs):
+    return hashlib.sha1(json.dumps(specs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _range_digest(path, start, end):
+    """
+    SHA-1 of the bytes [start, end) of a file.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+def _complete_lines_end(path, start):
+    """
+    Offset just past the last line break at or after `start` (or `start` if
+    there is none): rows after it may still be being written.
+    """
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > start:
+            block_start = max(start, end - READ_BLOCK_SIZE)
+            f.seek(block_start)
+            block = f.read(end - block_start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                return block_start + newline + 1
+            end = block_start
+    return start
+
+class _CsvSlice(io.RawIOBase):
+    """
+    Read-only stream of a CSV's header line followed by the bytes [start, end)
+    of the file, so pandas can parse just the appended rows.
+    """
+
+    def __init__(self, path, header, start, end):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._prefix = header
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        size = min(len(buffer), self._remaining)
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+def _csv_header(path):
+    with open(path, "rb") as f:
+        return f.readline()
+
+def _state_table_name(state_path, token, number):
+    return f"{os.path.basename(state_path)}.{token}.{number}.parquet"
+
+def _read_state_table(state_path, entry):
+    """
+    Loads one group's running totals from the Parquet file a state entry
+    names, restoring the group-key index and the (value, stat) columns.
+    """
+    file_name = entry["file"]
+    # Only plain file names next to the state file are accepted
+    if os.path.basename(file_name) != file_name or not file_name.startswith(os.path.basename(state_path) + "."):
+        raise ValueError(f"Unexpected state file name: {file_name}")
+    table = pd.read_parquet(os.path.join(os.path.dirname(state_path), file_name))
+    keys = entry["index"] + entry["columns"]
+    table = table.set_index([f"k{i}" for i in range(len(keys))])
+    table.index.names = keys
+    table.columns = pd.MultiIndex.from_tuples([tuple(col) for col in entry["stats"]])
+    return table
+
+def load_state(state_path, input_path, specs):
+    """
+    Returns the saved refresh state if it still applies to `input_path` and
+    `specs`: same specs, same header, and the first bytes of the file and the
+    bytes just before the saved offset unchanged (the file was only appended
+    to). Otherwise None.
+    """
+    if not os.path.exists(state_path):
+        return None
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("format") != STATE_FORMAT \
+            or state.get("specs") != specs_fingerprint(specs):
+        return None
+    state["header"] = state["header"].encode("latin-1")
+    offset = state["offset"]
+    if os.path.getsize(input_path) < offset or _csv_header(input_path) != state["header"]:
+        return None
+    if _range_digest(input_path, 0, min(offset, CHECK_BYTES)) != state["head_sha1"]:
+        return None
+    if _range_digest(input_path, max(0, offset - CHECK_BYTES), offset) != state["tail_sha1"]:
+        return None
+    try:
+        state["states"] = {
+            (tuple(entry["index"]), tuple(entry["columns"])): _read_state_table(state_path, entry)
+            for entry in state["states"]
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+    return state
+
+def save_state(state, state_path):
+    """
+    Writes the refresh state: the running totals of each group to their own
+    Parquet file, and the offsets, fingerprints and file names to JSON at
+    `state_path`. The JSON is replaced atomically after the Parquet files are
+    written, so an interrupted run leaves the old state intact; the files of
+    the previous state are removed afterwards.
+    """
+    directory = os.path.dirname(state_path) or "."
+    token = os.urandom(8).hex()
+    entries = []
+    for number, ((index, columns), table) in enumerate(state["states"].items()):
+        file_name = _state_table_name(state_path, token, number)
+        flat = table.copy()
+        flat.columns = [f"v{i}" for i in range(flat.shape[1])]
+        flat.index.names = [f"k{i}" for i in range(flat.index.nlevels)]
+        flat.reset_index().to_parquet(os.path.join(directory, file_name), index=False)
+        entries.append({
+            "index": list(index), "columns": list(columns), "file": file_name,
+            "stats": [list(col) for col in table.columns],
+        })
+
+    manifest = {key: value for key, value in state.items() if key != "states"}
+    manifest["header"] = state["header"].decode("latin-1")
+    manifest["states"] = entries
+    temp_path = state_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, default=str)
+    os.replace(temp_path, state_path)
+
+    # Parquet files of earlier (or interrupted) saves
+    current = {entry["file"] for entry in entries}
+    prefix = os.path.basename(state_path) + "."
+    for file_name in os.listdir(directory):
+        if file_name.startswith(prefix) and file_name.endswith(".parquet") and file_name not in current:
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(directory, file_name))
+
+def refresh_states(input_path, specs, state=None, chunksize=500_000):
+    """
+    Folds the rows appended to a CSV since `state` was saved (all rows if
+    `state` is None) into its per-group totals.
+
+    Returns:
+        (new_state, rows_added)
+    """
+    _check_mergeable(specs)
+    header = state["header"] if state else _csv_header(input_path)
+    start = state["offset"] if state else len(header)
+    end = _complete_lines_end(input_path, start)
+
+    rows_added = 0
+    states = state["states"] if state else {}
+    if end > start:
+        def counted(chunks):
+            nonlocal rows_added
+            for chunk in chunks:
+                rows_added += len(chunk)
+                yield chunk
+
+        with io.BufferedReader(_CsvSlice(input_path, header, start, end)) as stream:
+            chunks = pd.read_csv(stream, usecols=required_columns(specs), chunksize=chunksize)
+            states = fold_chunks(counted(chunks), specs, states)
+
+    return {
+        "format": STATE_FORMAT,
+        "input": os.path.abspath(input_path),
+        "specs": specs_fingerprint(specs),
+        "header": header,
+        "offset": end,
+        "rows": (state["rows"] if state else 0) + rows_added,
+        "head_sha1": _range_digest(input_path, 0, min(end, CHECK_BYTES)),
+        "tail_sha1": _range_digest(input_path, max(0, end - CHECK_BYTES), end),
+        "states": states,
+    }, rows_added
+
+def refresh_pivots(input_path, specs, output_path, chunksize=500_000):
+    """
+    Incremental version of run_pivot_specs for a CSV that is only appended
+    to. Reuses the state saved next to `output_path` when it still matches
+    the file, so only new rows are read.
+
+    Returns:
+        (tables, rows_added, rebuilt): the pivots, how many rows were read
+        this run, and whether the pivots had to be rebuilt from scratch.
+    """
+    state_path = state_path_for(output_path)
+    previous = load_state(state_path, input_path, specs)
+    state, rows_added = refresh_states(input_path, specs, previous, chunksize)
+    tables = finalize_states(state["states"], specs)
+    write_pivots(tables, output_path)
+    save_state(state, state_path)
+    return tables, rows_added, previous is None
 
 # ===========================
-# Summary of Execution
+# Excel Sidecar Cache
 # ===========================
 
-print("\n--- Process Summary ---")
-print(f"Input File: {input_file_path}")
-print(f"Output File: {output_file_path}")
-print(f"Pivot Table Configurations: ")
-print(f"    Values: {pivot_values}")
-print(f"    Index: {pivot_index}")
-print(f"    Columns: {pivot_columns}")
-print(f"    Aggregation Function: {pivot_aggfunc}")
-print(f"    Fill Value: {pivot_fill_value}")
-print("Script execution completed successfully!")
+class ExcelSidecarCache:
+    """
+    Parquet copies of Excel workbooks, so repeated reads skip the slow Excel
+    parse and load only the columns they need.
+
+    An entry is reused while the workbook's path, size and modification time
+    are unchanged. If only the size/mtime changed (e.g. the file was copied or
+    re-saved), its SHA-256 is compared and the copy is reused when the
+    contents are the same. A copy no workbook refers to any more is removed,
+    and when the copies exceed `max_bytes`, the least recently used ones are
+    removed. Several runs may share the cache directory.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, self.INDEX_FILE)
+        self._hashes = {}
+
+    def _load_index(self):
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        temp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(temp_path, self._index_path)
+
+    @contextlib.contextmanager
+    def _locked_index(self):
+        """
+        Yields the index for a read-modify-write and saves it afterwards. An
+        exclusive lock on a lock file serializes concurrent runs (POSIX only;
+        elsewhere the atomic replace at least keeps the file whole).
+        """
+        with open(self._index_path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                index = self._load_index()
+                yield index
+                self._save_index(index)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _file_sha256(self, path, stat):
+        """
+        SHA-256 of the workbook, computed once per (path, size, mtime) so a
+        lookup followed by a store reads the file once.
+        """
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        if key not in self._hashes:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+                    digest.update(block)
+            self._hashes[key] = digest.hexdigest()
+        return self._hashes[key]
+
+    def lookup(self, path):
+        """
+        Returns the Parquet copy of `path` if there is a current one, else None.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        index = self._load_index()
+        entry = index.get(path)
+        if entry is None or (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            # Same contents under a new mtime (or a copy of a cached file)?
+            content_hash = self._file_sha256(path, stat)
+            entry = next((e for e in index.values() if e["sha256"] == content_hash
+                          and os.path.exists(os.path.join(self.cache_dir, e["file"]))), None)
+            if entry is None:
+                return None
+            entry = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        sidecar = os.path.join(self.cache_dir, entry["file"])
+        if not os.path.exists(sidecar):
+            return None
+        with self._locked_index() as index:
+            index[path] = dict(entry, last_used=time.time())
+        return sidecar
+
+    def store(self, path, data):
+        """
+        Saves `data` (the full contents of workbook `path`) as its Parquet copy,
+        replacing the copy of the workbook's previous contents. Returns the
+        copy's path, or None if the data can't be stored as Parquet or the copy
+        alone is bigger than the cache.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        content_hash = self._file_sha256(path, stat)
+        file_name = f"{content_hash}.parquet"
+        sidecar = os.path.join(self.cache_dir, file_name)
+        temp_path = f"{sidecar}.{os.getpid()}.tmp"
+        try:
+            data.to_parquet(temp_path, index=False)
+        except Exception:
+            # e.g. a column mixing numbers and text, which Parquet can't type
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        if os.path.getsize(temp_path) > self.max_bytes:
+            os.remove(temp_path)
+            return None
+
+        with self._locked_index() as index:
+            # Under the lock, so another run's eviction can't remove it before it is indexed
+            os.replace(temp_path, sidecar)
+            index[path] = {
+                "file": file_name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                "sha256": content_hash, "bytes": os.path.getsize(sidecar), "last_used": time.time(),
+            }
+            self._evict(index)
+        return sidecar
+
+    def _evict(self, index):
+        """
+        Removes Parquet copies no index entry refers to any more (e.g. the copy
+        of a workbook's previous contents), then least recently used copies
+        until the cache fits in max_bytes.
+        """
+        files = {}
+        for entry in index.values():
+            used = files.get(entry["file"], {"bytes": entry["bytes"], "last_used": 0})
+            used["last_used"] = max(used["last_used"], entry["last_used"])
+            files[entry["file"]] = used
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".parquet") and file_name not in files:
+                os.remove(os.path.join(self.cache_dir, file_name))
+        total = sum(f["bytes"] for f in files.values())
+        for file_name, info in sorted(files.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            sidecar = os.path.join(self.cache_dir, file_name)
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+            total -= info["bytes"]
+            for cached_path in [p for p, e in index.items() if e["file"] == file_name]:
+                del index[cached_path]
+
+    def read_excel(self, path, columns=None):
+        """
+        pd.read_excel(path, usecols=columns), served from the Parquet copy when there is one.
+        """
+        sidecar = self.lookup(path)
+        if sidecar is None:
+            data = pd.read_excel(path)
+            sidecar = self.store(path, data)
+            if sidecar is None:
+                return data[columns] if columns else data
+        if columns:
+            import pyarrow.parquet as pq
+
+            available = pq.read_schema(sidecar).names
+            missing = [col for col in columns if col not in available]
+            if missing:
+                raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+        return pd.read_parquet(sidecar, columns=columns)
+
+def load_data(path, columns=None, cache=None):
+    """
+    Reads the input file (Excel, CSV or Parquet), only the given columns.
+    Excel files go through `cache` (an ExcelSidecarCache) when one is given.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return pd.read_csv(path, usecols=columns)
+    if extension == ".parquet":
+        return pd.read_parquet(path, columns=columns)
+    if cache is not None and extension in EXCEL_EXTENSIONS:
+        return cache.read_excel(path, columns)
+    return pd.read_excel(path, usecols=columns)
+
+def load_specs(path):
+    """
+    Reads a list of pivot specs from a YAML or JSON file (a bare list, or a
+    mapping with a 'pivots' list).
+    """
+    with open(path) as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            import yaml
+            specs = yaml.safe_load(f)
+        else:
+            specs = json.load(f)
+    if isinstance(specs, dict):
+        specs = specs.get("pivots", [])
+    return [normalize_spec(spec, position) for position, spec in enumerate(specs, start=1)]
+
+def sheet_names(names):
+    """
+    Maps pivot names to unique sheet names of at most 31 characters.
+    """
+    used, result = set(), {}
+    for position, name in enumerate(names, start=1):
+        sheet = name[:MAX_SHEET_NAME_LENGTH]
+        if sheet in used:
+            suffix = f" ({position})"
+            sheet = name[:MAX_SHEET_NAME_LENGTH - len(suffix)] + suffix
+        used.add(sheet)
+        result[name] = sheet
+    return result
+
+def write_pivots(tables, path):
+    """
+    Writes each pivot table to its own sheet of one Excel workbook.
+    """
+    sheets = sheet_names(tables)
+    with pd.ExcelWriter(path) as writer:
+        for name, table in tables.items():
+            table.to_excel(writer, sheet_name=sheets[name])
+
+def run_pivot_specs(input_path, specs, output_path=None, cache=None):
+    """
+    Reads the input once (only the needed columns) and builds every pivot.
+
+    Returns:
+        dict: Pivot name -> pivot table.
+    """
+    specs = [spec if "values_multi" in spec else normalize_spec(spec, position)
+             for position, spec in enumerate(specs, start=1)]
+    tables = build_pivots(load_data(input_path, required_columns(specs), cache), specs)
+    if output_path:
+        write_pivots(tables, output_path)
+    return tables
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate pivot tables from a sales data file.")
+    parser.add_argument("--input", default=input_file_path, help="Input file (Excel, CSV or Parquet)")
+    parser.add_argument("--output", default=output_file_path, help="Output Excel file")
+    parser.add_argument("--spec", help="YAML/JSON file listing the pivots to build (one sheet each)")
+    parser.add_argument("--chunksize", type=int,
+                        help="Stream the input in chunks of this many rows (for data larger than memory)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="CSV input only: fold in just the rows appended since the last run")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Where Parquet copies of Excel inputs are kept")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // 1024 ** 2,
+                        help="Maximum size of the Excel cache")
+    parser.add_argument("--no-cache", action="store_true", help="Always read Excel inputs directly")
+    args = parser.parse_args(argv)
+    if args.incremental and os.path.splitext(args.input)[1].lower() != ".csv":
+        parser.error("--incremental needs a CSV input file")
+    if args.incremental and not importlib.util.find_spec("pyarrow"):
+        parser.error("--incremental needs pyarrow to save its state (pip install pyarrow)")
+
+    cache = None
+    # The cache stores Parquet, which needs pyarrow
+    if not args.no_cache and importlib.util.find_spec("pyarrow"):
+        cache = ExcelSidecarCache(args.cache_dir, args.cache_size_mb * 1024 ** 2)
+
+    if args.spec:
+        try:
+            specs = load_specs(args.spec)
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not read the pivot spec file - {e}")
+            sys.exit(1)
+    else:
+        # Single pivot from the configuration section
+        specs = [normalize_spec({
+            "name": "Sheet1", "values": pivot_values, "index": pivot_index, "columns": pivot_columns,
+            "aggfunc": pivot_aggfunc, "fill_value": pivot_fill_value,
+        })]
+
+    # ===========================
+    # Step 1: Load Excel Data
+    # ===========================
+
+    try:
+        if args.incremental:
+            # Incremental mode reads only the new rows while aggregating (Step 2)
+            if not os.path.exists(args.input):
+                raise FileNotFoundError(args.input)
+            state = load_state(state_path_for(args.output), args.input, specs)
+            if state:
+                print(f"Reading rows appended to {args.input} since the last run ({state['rows']:,} rows done)...")
+            else:
+                print(f"No usable saved state; reading all of {args.input}...")
+        elif args.chunksize:
+            # Chunked mode reads the data while aggregating (Step 2)
+            if not os.path.exists(args.input):
+                raise FileNotFoundError(args.input)
+            print(f"Streaming data from {args.input} in chunks of {args.chunksize:,} rows...")
+        else:
+            print(f"Loading data from {args.input}...")
+            # Read only the columns the pivots use, once for all pivots
+            data = load_data(args.input, required_columns(specs), cache)
+            print("Data loaded successfully! Here are the first few rows of your dataset:")
+            print(data.head())  # Display the first few rows for confirmation
+    except FileNotFoundError:
+        print(f"Error: The file '{args.input}' was not found. Please check the file path and try again.")
+        sys.exit(1)  # Exit the script with an error code if the file is not found
+    except ValueError as e:
+        print(f"Error: {e}. Please check your pivot table configuration.")
+        sys.exit(1)  # Exit if required columns are missing from the file
+
+    # ===========================
+    # Step 2: Create Pivot Tables
+    # ===========================
+
+    try:
+        print(f"Creating {len(specs)} pivot table(s)...")
+        # Pivots with the same rows/columns share one groupby
+        if args.incremental:
+            state, rows_added = refresh_states(args.input, specs, state, args.chunksize or 500_000)
+            tables = finalize_states(state["states"], specs)
+            print(f"Folded in {rows_added:,} new row(s).")
+        elif args.chunksize:
+            tables = build_pivots_chunked(args.input, specs, args.chunksize, cache)
+        else:
+            tables = build_pivots(data, specs)
+        for name, table in tables.items():
+            print(f"Pivot table '{name}' created successfully! Here's a preview:")
+            print(table.head())  # Display the first few rows of the pivot table
+    except KeyError as e:
+        print(f"Error: Missing required column in the data - {e}. Please check your pivot table configuration.")
+        sys.exit(1)  # Exit if required columns are missing
+    except ValueError as e:
+        print(f"Error: {e}. Please check your pivot table configuration.")
+        sys.exit(1)  # Exit if the pivot specs are inconsistent
+
+    # ===========================
+    # Step 3: Save Pivot Tables
+    # ===========================
+
+    try:
+        print(f"Saving pivot table(s) to {args.output}...")
+        # Save every pivot table to its own sheet of one Excel file
+        write_pivots(tables, args.output)
+        if args.incremental:
+            # Saved after the workbook, so a failed save just repeats this refresh next time
+            save_state(state, state_path_for(args.output))
+        print(f"Pivot table(s) successfully saved as '{args.output}'!")
+    except Exception as e:
+        print(f"Error while saving the pivot table: {e}")
+        sys.exit(1)  # Exit if an error occurs during file saving
+
+    # ===========================
+    # Summary of Execution
+    # ===========================
+
+    print("\n--- Process Summary ---")
+    print(f"Input File: {args.input}")
+    print(f"Output File: {args.output}")
+    for spec in specs:
+        print(f"Pivot Table Configurations ({spec['name']}): ")
+        print(f"    Values: {', '.join(map(str, spec['values']))}")
+        print(f"    Index: {', '.join(map(str, spec['index']))}")
+        print(f"    Columns: {', '.join(map(str, spec['columns']))}")
+        print(f"    Aggregation Function: {spec['aggfunc']}")
+        print(f"    Fill Value: {spec['fill_value']}")
+    print("Script execution completed successfully!")
+
+if __name__ == "__main__":
+    main()
 
 # ===========================
 # Additional Notes
 # ===========================
 # - Ensure that the input Excel file exists and contains the necessary columns.
 # - Modify the pivot table configurations as needed for different analyses.
-# - This script can be extended further to handle multiple pivot tables or automate email distribution.
\ No newline at end of file
+# - Pivots listed in one spec file share a single read of the data, so adding pivots is cheap.
@@ -11,6 +11,16 @@ FEATURES:
 3. Checks email validity with a simple regex
 4. Normalizes/validates the data (e.g. marking invalid emails)
 5. Writes the processed data out to a new CSV file
+6. Streams rows from input to output, so memory use stays flat for
+   multi-million row exports
+7. Optional multi-process mode that splits multi-GB files into shards on
+   record boundaries and merges the results back in the original order
+8. Headless batch mode for whole directories, reusing stored column-mapping
+   profiles for header layouts it has already seen
+9. Optional vectorized engine (requires pandas and pyarrow) that validates and
+   splits a whole column at a time; see benchmark_process_event_list.py
+10. Optional cross-run dedup index (SQLite) that marks or drops contacts that
+    were already processed in earlier runs
 
 --------------------------------------------------------------------------------
 INSTRUCTIONS TO RUN:
@@ -44,17 +54,78 @@ INSTRUCTIONS TO RUN:
    - You will be asked to specify:
        - The input CSV file path
        - Confirmation or override of which columns represent 'Full Name', 'First Name', 'Last Name', and 'Email'
-       - The desired output CSV file path
+       - The desired output CSV file path (asked before processing, since rows
+         are written out as they are read)
+       - How many worker processes to use (default 1)
 
-6. CHECK THE OUTPUT:
+   - Confirmed column mappings are saved to "column_profiles.json" and reused
+     the next time a file with the same header comes along.
+
+6. BATCH MODE (NO PROMPTS):
+   - Process a whole directory of event files unattended:
+       python process_event_list.py --batch ./events --output-dir ./processed
+   - Add --concurrent-files 4 to work on several files at once, or
+     --workers 4 to shard each large file across processes.
+   - Add --engine vectorized to use the pandas/Arrow columnar engine.
+   - Headers that have no stored profile are auto-detected and added to
+     "column_profiles.json" (marked "auto") so they can be reviewed.
+
+7. SKIPPING CONTACTS FROM EARLIER RUNS:
+   - Add --dedup-index seen_contacts.sqlite to keep an index of every email
+     processed so far. Contacts already in it get "Previously Processed?" =
+     "Yes", or are left out entirely with --dedup-mode drop.
+   - Works in both interactive and batch mode.
+
+8. CHECK THE OUTPUT:
    - Open the output CSV file (default: "processed_event_list.csv")
    - Verify that data has been correctly split into first name, last name, validated email, etc.
 ================================================================================
 """
 
+import argparse
 import csv
+import hashlib
+import io
+import json
 import re
 import os
+import shutil
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    # Optional: only needed for the vectorized engine
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pd = pa = pc = None
+
+# Columns written to the output CSV, in order
+OUTPUT_FIELDNAMES = ["First Name", "Last Name", "Email", "Email Valid?"]
+
+# Compiled once at import time instead of on every is_valid_email() call
+EMAIL_PATTERN = re.compile(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)")
+
+# The same pattern for Arrow's RE2 engine (with the '-' in each class escaped)
+ARROW_EMAIL_PATTERN = r"^[a-zA-Z0-9_.+\-]+@[a-zA-Z0-9\-]+\.[a-zA-Z0-9.\-]+$"
+
+# Whitespace handling for the vectorized engine. str.split()/str.strip() also
+# treat some non-ASCII characters as whitespace; rows containing those are
+# handed back to the row-by-row functions.
+ASCII_WHITESPACE = " \t\n\x0b\x0c\r"
+PYTHON_ONLY_WHITESPACE_CLASS = "".join(
+    f"\\x{{{code:04x}}}" for code in range(0x3001)
+    if chr(code).isspace() and chr(code) not in ASCII_WHITESPACE
+)
+
+# Extra output column added when the dedup index runs in "mark" mode
+PREVIOUSLY_PROCESSED_FIELD = "Previously Processed?"
+DEDUP_LOOKUP_BATCH_SIZE = 500
+
+# Column-mapping profiles, keyed by a fingerprint of each file's header row
+DEFAULT_PROFILE_PATH = "column_profiles.json"
 
 def is_valid_email(email: str) -> bool:
     """
@@ -62,8 +133,7 @@ def is_valid_email(email: str) -> bool:
     NOTE: This is a basic pattern. For more robust checks, you may want a more
     comprehensive regex or a dedicated validation library.
     """
-    email_regex = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
-    return True if re.match(email_regex, email) else False
+    return True if EMAIL_PATTERN.match(email) else False
 
 def split_name(full_name: str):
     """
@@ -97,7 +167,642 @@ def get_user_input(prompt: str, default_value: str = "") -> str:
     user_in = input(f"{prompt} [default: {default_value}]: ").strip()
     return user_in if user_in else default_value
 
-def process_event_list():
+def detect_columns(fieldnames):
+    """
+    Tries to detect which header columns hold the Full Name, First Name,
+    Last Name and Email values. Returns a dict with the keys "full_name",
+    "first_name", "last_name" and "email" (None where nothing was detected).
+    """
+    # Possible columns we want to detect
+    possible_name_columns = ["Name", "Full Name", "Participant Name"]
+    possible_first_name_columns = ["First Name", "FName", "FirstName"]
+    possible_last_name_columns = ["Last Name", "LName", "LastName"]
+    possible_email_columns = ["Email", "E-mail", "Email Address"]
+
+    detected = {"full_name": None, "first_name": None, "last_name": None, "email": None}
+
+    for col in fieldnames or []:
+        clean_col = col.strip().lower()
+        if clean_col in [x.lower() for x in possible_name_columns]:
+            detected["full_name"] = col
+        if clean_col in [x.lower() for x in possible_first_name_columns]:
+            detected["first_name"] = col
+        if clean_col in [x.lower() for x in possible_last_name_columns]:
+            detected["last_name"] = col
+        if clean_col in [x.lower() for x in possible_email_columns]:
+            detected["email"] = col
+
+    return detected
+
+def confirm_columns(detected):
+    """
+    Lets the user confirm or override each detected column.
+    Returns a new dict with the same keys as detect_columns().
+    """
+    labels = [
+        ("full_name", "a 'Full Name'", "Full Name"),
+        ("first_name", "a 'First Name'", "First Name"),
+        ("last_name", "a 'Last Name'", "Last Name"),
+        ("email", "an 'Email'", "Email"),
+    ]
+    confirmed = {}
+    for key, article_label, label in labels:
+        if detected.get(key):
+            confirmed[key] = get_user_input(
+                f"Detected '{detected[key]}' as the {label} column. "
+                "Press Enter to confirm or type an alternative column name",
+                detected[key]
+            )
+        else:
+            confirmed[key] = get_user_input(
+                f"Could not detect {article_label} column. "
+                "Enter the column name if you have one",
+                ""
+            )
+    return confirmed
+
+def normalize_row(row: dict, columns: dict) -> dict:
+    """
+    Turns one input row into a processed contact using the confirmed columns.
+    """
+    first_name = ""
+    last_name = ""
+    full_name_col = columns.get("full_name")
+    first_name_col = columns.get("first_name")
+    last_name_col = columns.get("last_name")
+    email_col = columns.get("email")
+
+    # If we have a dedicated first name column
+    if first_name_col and first_name_col in row:
+        first_name = row[first_name_col].strip()
+
+    # If we have a dedicated last name column
+    if last_name_col and last_name_col in row:
+        last_name = row[last_name_col].strip()
+
+    # If first/last are still missing, try full name
+    if (not first_name or not last_name) and full_name_col and full_name_col in row:
+        split_first, split_last = split_name(row[full_name_col])
+        if not first_name:
+            first_name = split_first
+        if not last_name:
+            last_name = split_last
+
+    # Extract and validate email
+    email = ""
+    if email_col and email_col in row:
+        email = row[email_col].strip()
+
+    email_valid = is_valid_email(email) if email else False
+
+    processed_contact = {
+        "First Name": first_name,
+        "Last Name": last_name,
+        "Email": email,
+        "Email Valid?": "Yes" if email_valid else "No"
+    }
+
+    # You can copy additional columns if you wish, for example:
+    # processed_contact["Company"] = row.get("Company", "").strip()
+
+    return processed_contact
+
+def iter_processed_rows(reader, columns):
+    """
+    Generator that normalizes rows one at a time as they are read, so only
+    the current row is held in memory no matter how large the input is.
+    """
+    for row in reader:
+        yield normalize_row(row, columns)
+
+def write_processed_rows(rows, output_file_path, preview_size=5, fieldnames=OUTPUT_FIELDNAMES):
+    """
+    Streams processed contacts straight into the output CSV.
+    Keeps the first `preview_size` rows in a small side buffer for the
+    sample output and returns (rows_written, preview).
+    """
+    preview = []
+    rows_written = 0
+    with open(output_file_path, "w", newline="", encoding="utf-8") as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for contact in rows:
+            writer.writerow(contact)
+            if len(preview) < preview_size:
+                preview.append(contact)
+            rows_written += 1
+    return rows_written, preview
+
+class DedupIndex:
+    """
+    On-disk index of contacts processed in earlier runs, stored as hashes of
+    the normalized (stripped, lower-cased) email address in a SQLite B-tree.
+    Lookups are O(log n) even with tens of millions of historical contacts.
+
+    New emails are added as they are checked; call commit() once the output
+    file has been written so a failed run does not mark contacts as processed.
+    """
+
+    def __init__(self, index_path):
+        self.connection = sqlite3.connect(index_path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS seen_emails (email_hash BLOB PRIMARY KEY) WITHOUT ROWID"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def email_hash(email):
+        """
+        Returns the 16-byte hash used as the index key for an email address.
+        """
+        normalized = email.strip().lower().encode("utf-8")
+        return hashlib.blake2b(normalized, digest_size=16).digest()
+
+    def check_and_add(self, emails):
+        """
+        Returns a list of booleans, True where the email was already seen in an
+        earlier run or earlier in this one. Empty emails are never duplicates.
+        Unseen emails are added to the index.
+        """
+        hashes = [self.email_hash(email) if email else None for email in emails]
+        lookup = list({h for h in hashes if h is not None})
+        seen = set()
+        # SQLite limits the number of bound parameters, so look up in slices
+        for start in range(0, len(lookup), DEDUP_LOOKUP_BATCH_SIZE):
+            batch = lookup[start:start + DEDUP_LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            seen.update(
+                row[0] for row in self.connection.execute(
+                    f"SELECT email_hash FROM seen_emails WHERE email_hash IN ({placeholders})", batch
+                )
+            )
+
+        already_seen = []
+        new_hashes = []
+        for h in hashes:
+            if h is None:
+                already_seen.append(False)
+            elif h in seen:
+                already_seen.append(True)
+            else:
+                already_seen.append(False)
+                seen.add(h)  # Later rows in this run with the same email are duplicates
+                new_hashes.append((h,))
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO seen_emails (email_hash) VALUES (?)", new_hashes
+        )
+        return already_seen
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+def dedup_fieldnames(dedup_mode):
+    """
+    Output columns for a dedup mode: "mark" adds a "Previously Processed?"
+    column, "drop" keeps the normal columns.
+    """
+    if dedup_mode == "mark":
+        return OUTPUT_FIELDNAMES + [PREVIOUSLY_PROCESSED_FIELD]
+    return OUTPUT_FIELDNAMES
+
+def apply_dedup(rows, dedup_index, dedup_mode="mark", batch_size=DEDUP_LOOKUP_BATCH_SIZE):
+    """
+    Generator that checks processed contacts against the dedup index in small
+    batches. In "mark" mode every row is kept and flagged; in "drop" mode rows
+    that were already processed are left out.
+    """
+    batch = []
+    for contact in rows:
+        batch.append(contact)
+        if len(batch) >= batch_size:
+            yield from _dedup_batch(batch, dedup_index, dedup_mode)
+            batch = []
+    if batch:
+        yield from _dedup_batch(batch, dedup_index, dedup_mode)
+
+def _dedup_batch(batch, dedup_index, dedup_mode):
+    already_seen = dedup_index.check_and_add([contact["Email"] for contact in batch])
+    for contact, seen in zip(batch, already_seen):
+        if dedup_mode == "mark":
+            contact[PREVIOUSLY_PROCESSED_FIELD] = "Yes" if seen else "No"
+            yield contact
+        elif not seen:
+            yield contact
+
+def validate_email_column(emails):
+    """
+    Vectorized is_valid_email() for a whole Arrow string column of stripped
+    emails. Returns a boolean Arrow array; empty strings are invalid, as in
+    normalize_row().
+    """
+    return pc.and_(
+        pc.not_equal(emails, ""),
+        pc.match_substring_regex(emails, ARROW_EMAIL_PATTERN),
+    )
+
+def split_name_column(names):
+    """
+    Vectorized split_name() for a whole Arrow string column.
+    Returns (first_names, last_names) as two Arrow arrays.
+    """
+    words = pc.ascii_split_whitespace(pc.utf8_trim(names, characters=ASCII_WHITESPACE))
+    first = pc.fill_null(pc.list_element(words, 0), "")
+    # split_name() joins the remaining words with single spaces
+    last = pc.fill_null(pc.binary_join(pc.list_slice(words, 1), " "), "")
+    return first, last
+
+def normalize_frame(df, columns):
+    """
+    Vectorized normalize_row() for a whole DataFrame chunk, using Arrow string
+    kernels. Returns a DataFrame with OUTPUT_FIELDNAMES as its columns.
+
+    The Arrow kernels only know ASCII whitespace, so the few rows that contain
+    other whitespace characters (non-breaking spaces etc.) are re-done with
+    normalize_row() to keep the output identical to the row-by-row engine.
+    """
+    num_rows = len(df)
+    empty = pa.array([""] * num_rows, type=pa.string())
+    source_cols = {}
+
+    def source_column(key):
+        col = columns.get(key)
+        if col and col in df.columns:
+            values = pc.fill_null(pa.array(df[col], type=pa.string(), from_pandas=True), "")
+            source_cols[col] = values
+            return values
+        return None
+
+    first_name = source_column("first_name")
+    first_name = pc.utf8_trim(first_name, characters=ASCII_WHITESPACE) if first_name is not None else empty
+    last_name = source_column("last_name")
+    last_name = pc.utf8_trim(last_name, characters=ASCII_WHITESPACE) if last_name is not None else empty
+
+    # Fill missing first/last names from the full name, like normalize_row()
+    full_name = source_column("full_name")
+    if full_name is not None:
+        split_first, split_last = split_name_column(full_name)
+        first_name = pc.if_else(pc.equal(first_name, ""), split_first, first_name)
+        last_name = pc.if_else(pc.equal(last_name, ""), split_last, last_name)
+
+    email = source_column("email")
+    email = pc.utf8_trim(email, characters=ASCII_WHITESPACE) if email is not None else empty
+    email_valid = validate_email_column(email)
+
+    result = pa.table({
+        "First Name": first_name,
+        "Last Name": last_name,
+        "Email": email,
+        "Email Valid?": pc.if_else(email_valid, "Yes", "No"),
+    }).to_pandas()
+    result.index = df.index
+
+    # Redo rows with non-ASCII whitespace the slow way
+    fallback = None
+    for values in source_cols.values():
+        has_other_whitespace = pc.match_substring_regex(values, f"[{PYTHON_ONLY_WHITESPACE_CLASS}]")
+        fallback = has_other_whitespace if fallback is None else pc.or_(fallback, has_other_whitespace)
+    if fallback is not None and pc.any(fallback).as_py():
+        positions = pc.indices_nonzero(fallback)
+        names = list(source_cols)
+        value_lists = [source_cols[name].take(positions).to_pylist() for name in names]
+        redone = [normalize_row(dict(zip(names, values)), columns) for values in zip(*value_lists)]
+        result.iloc[positions.to_numpy(), :] = pd.DataFrame(
+            redone, columns=OUTPUT_FIELDNAMES
+        ).to_numpy()
+    return result
+
+def process_file_vectorized(input_file_path, output_file_path, columns,
+                            chunksize=100_000, preview_size=5,
+                            dedup_index=None, dedup_mode="mark"):
+    """
+    Columnar path: reads the input in chunks with pandas, normalizes each chunk
+    with normalize_frame() and appends it to the output CSV. Memory stays
+    bounded by the chunk size. Returns (rows_written, preview).
+    """
+    if pd is None or pa is None:
+        raise ImportError("The vectorized engine needs pandas and pyarrow (pip install pandas pyarrow).")
+
+    preview = []
+    rows_written = 0
+    reader = pd.read_csv(
+        input_file_path, dtype=str, keep_default_na=False,
+        encoding="utf-8-sig", chunksize=chunksize
+    )
+    with open(output_file_path, "w", newline="", encoding="utf-8") as outfile:
+        fieldnames = dedup_fieldnames(dedup_mode) if dedup_index else OUTPUT_FIELDNAMES
+        csv.DictWriter(outfile, fieldnames=fieldnames).writeheader()
+        for chunk in reader:
+            processed = normalize_frame(chunk, columns)
+            if dedup_index:
+                already_seen = pd.Series(
+                    dedup_index.check_and_add(processed["Email"].tolist()), index=processed.index
+                )
+                if dedup_mode == "mark":
+                    processed[PREVIOUSLY_PROCESSED_FIELD] = already_seen.map({True: "Yes", False: "No"})
+                else:
+                    processed = processed[~already_seen]
+            # Same line endings as csv.DictWriter so both engines write identical files
+            processed.to_csv(outfile, header=False, index=False, lineterminator="\r\n")
+            if len(preview) < preview_size:
+                preview.extend(processed.head(preview_size - len(preview)).to_dict("records"))
+            rows_written += len(processed)
+    return rows_written, preview
+
+def read_header(input_file_path):
+    """
+    Reads just the header row of the input CSV and returns its field names.
+    """
+    with open(input_file_path, "r", encoding="utf-8-sig", newline="") as infile:
+        return csv.DictReader(infile).fieldnames or []
+
+def process_file(input_file_path, output_file_path, columns, preview_size=5,
+                 dedup_index=None, dedup_mode="mark"):
+    """
+    Single-process streaming path: reads, normalizes and writes one row at a
+    time. Returns (rows_written, preview).
+    """
+    with open(input_file_path, "r", encoding="utf-8-sig", newline="") as infile:
+        rows = iter_processed_rows(csv.DictReader(infile), columns)
+        fieldnames = OUTPUT_FIELDNAMES
+        if dedup_index:
+            rows = apply_dedup(rows, dedup_index, dedup_mode)
+            fieldnames = dedup_fieldnames(dedup_mode)
+        return write_processed_rows(rows, output_file_path, preview_size, fieldnames)
+
+def find_shard_boundaries(input_file_path, num_shards, block_size=1 << 20):
+    """
+    Splits the input file into byte ranges that each start and end on a record
+    boundary. Returns (header_end, shards) where shards is a list of
+    (start, end) byte offsets covering everything after the header row.
+
+    Quoted fields may contain newlines, so a newline only counts as a record
+    boundary when an even number of quote characters precede it. This relies on
+    standard CSV quoting (quotes inside a field are doubled and the field is
+    quoted), which is what Excel, Zoom, Eventbrite etc. produce. Files with
+    stray quote characters in unquoted fields should use a single worker.
+    """
+    file_size = os.path.getsize(input_file_path)
+    # Offset 0 finds the end of the header row, the rest are the shard splits
+    targets = [0] + [file_size * i // num_shards for i in range(1, num_shards)]
+    boundaries = []
+    in_quotes = False
+    block_start = 0
+    target_index = 0
+
+    with open(input_file_path, "rb") as infile:
+        while target_index < len(targets):
+            block = infile.read(block_size)
+            if not block:
+                break
+            pos = 0
+            while target_index < len(targets) and targets[target_index] < block_start + len(block):
+                # Catch the quote parity up to the target, then look for the
+                # first newline after it that is not inside a quoted field
+                scan_from = max(targets[target_index] - block_start, pos)
+                in_quotes ^= block.count(b'"', pos, scan_from) % 2 == 1
+                pos = scan_from
+                newline = block.find(b"\n", pos)
+                while newline != -1:
+                    in_quotes ^= block.count(b'"', pos, newline) % 2 == 1
+                    pos = newline + 1
+                    if not in_quotes:
+                        break
+                    newline = block.find(b"\n", pos)
+                if newline == -1:
+                    # No boundary left in this block; keep searching in the next one
+                    break
+                boundary = block_start + pos
+                boundaries.append(boundary)
+                while target_index < len(targets) and targets[target_index] < boundary:
+                    target_index += 1
+            in_quotes ^= block.count(b'"', pos) % 2 == 1
+            block_start += len(block)
+
+    if not boundaries:
+        # Header only (or no newline at all)
+        return file_size, []
+
+    header_end = boundaries[0]
+    edges = [header_end] + [b for b in boundaries[1:] if b < file_size] + [file_size]
+    shards = [(start, end) for start, end in zip(edges, edges[1:]) if end > start]
+    return header_end, shards
+
+def _process_shard(task):
+    """
+    Worker for process_file_parallel(). Normalizes one byte range of the input
+    and writes it (without a header) to its own part file.
+    Returns (part_path, rows_written, preview).
+    """
+    input_file_path, start, end, fieldnames, columns, part_path, preview_size = task
+    with open(input_file_path, "rb") as infile:
+        infile.seek(start)
+        text = infile.read(end - start).decode("utf-8")
+
+    reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames)
+    preview = []
+    rows_written = 0
+    with open(part_path, "w", newline="", encoding="utf-8") as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=OUTPUT_FIELDNAMES)
+        for contact in iter_processed_rows(reader, columns):
+            writer.writerow(contact)
+            if len(preview) < preview_size:
+                preview.append(contact)
+            rows_written += 1
+    return part_path, rows_written, preview
+
+def process_file_parallel(input_file_path, output_file_path, columns, workers=None,
+                          max_shard_bytes=64 * 1024 * 1024, preview_size=5,
+                          dedup_index=None, dedup_mode="mark"):
+    """
+    Multi-process path for very large inputs. The file is split into byte-range
+    shards on record boundaries, each shard is normalized in a process pool,
+    and the shard outputs are concatenated into the output file in the
+    original row order. Returns (rows_written, preview).
+
+    With a dedup index the shard outputs are checked against it while they are
+    merged, so "first seen" still follows the original row order.
+    """
+    workers = workers or os.cpu_count() or 1
+    file_size = os.path.getsize(input_file_path)
+    # More shards than workers keeps the pool busy and caps per-shard memory
+    num_shards = max(workers, -(-file_size // max_shard_bytes), 1)
+    header_end, shards = find_shard_boundaries(input_file_path, num_shards)
+    fieldnames = read_header(input_file_path)
+
+    output_dir = os.path.dirname(os.path.abspath(output_file_path))
+    preview = []
+    rows_written = 0
+    with tempfile.TemporaryDirectory(dir=output_dir) as part_dir:
+        tasks = [
+            (input_file_path, start, end, fieldnames, columns,
+             os.path.join(part_dir, f"part_{i:05d}.csv"), preview_size)
+            for i, (start, end) in enumerate(shards)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor, \
+                open(output_file_path, "w", newline="", encoding="utf-8") as outfile:
+            fieldnames = dedup_fieldnames(dedup_mode) if dedup_index else OUTPUT_FIELDNAMES
+            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+            writer.writeheader()
+            # executor.map yields results in submission order, so shards are
+            # appended in the same order as the input rows
+            for part_path, part_rows, part_preview in executor.map(_process_shard, tasks):
+                with open(part_path, "r", newline="", encoding="utf-8") as part:
+                    if dedup_index:
+                        part_reader = csv.DictReader(part, fieldnames=OUTPUT_FIELDNAMES)
+                        for contact in apply_dedup(part_reader, dedup_index, dedup_mode):
+                            writer.writerow(contact)
+                            if len(preview) < preview_size:
+                                preview.append(contact)
+                            rows_written += 1
+                    else:
+                        shutil.copyfileobj(part, outfile)
+                        rows_written += part_rows
+                        preview.extend(part_preview[:preview_size - len(preview)])
+                os.remove(part_path)
+    return rows_written, preview
+
+def header_fingerprint(fieldnames):
+    """
+    Returns a stable fingerprint for a header row, used to look up a stored
+    column-mapping profile for files that share the same layout.
+    """
+    joined = "\x1f".join(name.strip() for name in fieldnames)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+def load_profiles(profile_path):
+    """
+    Loads the stored column-mapping profiles (header fingerprint -> profile).
+    Returns an empty dict if the profile file does not exist yet.
+    """
+    if not os.path.exists(profile_path):
+        return {}
+    with open(profile_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_profiles(profile_path, profiles):
+    """
+    Writes the column-mapping profiles, replacing the file atomically so a
+    crash mid-write never leaves a truncated profile store behind.
+    """
+    tmp_path = f"{profile_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, profile_path)
+
+def remember_profile(profiles, fieldnames, columns, source):
+    """
+    Stores the column mapping for this header layout in `profiles`.
+    `source` is "confirmed" for mappings a user checked, "auto" otherwise.
+    """
+    profiles[header_fingerprint(fieldnames)] = {
+        "fieldnames": list(fieldnames),
+        "columns": columns,
+        "source": source,
+    }
+
+def resolve_columns(fieldnames, profiles):
+    """
+    Non-interactive column lookup. Reuses the stored profile for this header if
+    there is one, otherwise falls back to auto-detection and records the result
+    as a new profile. Returns (columns, profile_was_known).
+    """
+    profile = profiles.get(header_fingerprint(fieldnames))
+    if profile:
+        return profile["columns"], True
+    columns = detect_columns(fieldnames)
+    remember_profile(profiles, fieldnames, columns, "auto")
+    return columns, False
+
+def process_with_engine(input_file_path, output_file_path, columns, workers=1,
+                        engine="python", dedup_index=None, dedup_mode="mark"):
+    """
+    Runs one file through the chosen engine. Returns (rows_written, preview).
+    """
+    if engine == "vectorized":
+        return process_file_vectorized(input_file_path, output_file_path, columns,
+                                       dedup_index=dedup_index, dedup_mode=dedup_mode)
+    if workers > 1:
+        return process_file_parallel(input_file_path, output_file_path, columns, workers,
+                                     dedup_index=dedup_index, dedup_mode=dedup_mode)
+    return process_file(input_file_path, output_file_path, columns,
+                        dedup_index=dedup_index, dedup_mode=dedup_mode)
+
+def _process_batch_file(task):
+    """
+    Worker for process_event_batch(). Returns (input_path, output_path, rows_written).
+    """
+    input_file_path, output_file_path, columns, workers, engine, dedup_path, dedup_mode = task
+    dedup_index = DedupIndex(dedup_path) if dedup_path else None
+    try:
+        rows_written, _ = process_with_engine(
+            input_file_path, output_file_path, columns, workers, engine, dedup_index, dedup_mode
+        )
+        if dedup_index:
+            dedup_index.commit()
+    finally:
+        if dedup_index:
+            dedup_index.close()
+    return input_file_path, output_file_path, rows_written
+
+def process_event_batch(input_dir, output_dir=None, profile_path=DEFAULT_PROFILE_PATH,
+                        workers=1, concurrent_files=1, engine="python",
+                        dedup_path=None, dedup_mode="mark"):
+    """
+    Headless batch mode: processes every CSV file in `input_dir` without any
+    prompts, in one interpreter. Column mappings come from the profile store
+    (keyed by header fingerprint); unseen headers are auto-detected and added
+    to the store so they can be reviewed and edited later.
+
+    Files are processed back-to-back, or `concurrent_files` at a time.
+    `workers` > 1 additionally shards each file across processes, and
+    engine="vectorized" uses the pandas/Arrow columnar engine instead.
+    With `dedup_path`, contacts already in the dedup index are marked or
+    dropped; files are then processed one at a time so "first seen" is
+    well defined.
+    Returns a list of (input_path, output_path, rows_written).
+    """
+    output_dir = output_dir or os.path.join(input_dir, "processed")
+    os.makedirs(output_dir, exist_ok=True)
+    profiles = load_profiles(profile_path)
+
+    tasks = []
+    for file_name in sorted(os.listdir(input_dir)):
+        input_file_path = os.path.join(input_dir, file_name)
+        if not file_name.lower().endswith(".csv") or not os.path.isfile(input_file_path):
+            continue
+        fieldnames = read_header(input_file_path)
+        columns, known = resolve_columns(fieldnames, profiles)
+        if not known:
+            print(f"New header layout in '{file_name}', using auto-detected columns: {columns}")
+        output_file_path = os.path.join(
+            output_dir, f"{os.path.splitext(file_name)[0]}_processed.csv"
+        )
+        tasks.append((input_file_path, output_file_path, columns, workers, engine,
+                      dedup_path, dedup_mode))
+
+    # Save new profiles before processing so they survive a failed file
+    save_profiles(profile_path, profiles)
+
+    if concurrent_files > 1 and dedup_path:
+        print("Dedup index in use: processing files one at a time.")
+        concurrent_files = 1
+    if concurrent_files > 1:
+        with ProcessPoolExecutor(max_workers=concurrent_files) as executor:
+            results = list(executor.map(_process_batch_file, tasks))
+    else:
+        results = [_process_batch_file(task) for task in tasks]
+
+    for input_file_path, output_file_path, rows_written in results:
+        print(f"{input_file_path} -> {output_file_path} ({rows_written} rows)")
+    return results
+
+def process_event_list(dedup_path=None, dedup_mode="mark", profile_path=DEFAULT_PROFILE_PATH,
+                       engine="python", workers=1):
     """
     Main function to:
     1. Prompt user for CSV file path
@@ -105,6 +810,13 @@ def process_event_list():
     3. Detect columns (Full Name, First Name, Last Name, Email)
     4. Split/transform/validate data
     5. Write output to new CSV
+
+    Rows are streamed from the input file straight into the output file,
+    so memory use stays flat regardless of the input size. With more than one
+    worker the file is split into shards that are processed in parallel.
+    With a dedup index, contacts seen in earlier runs are marked or dropped.
+    `profile_path` and `engine` are the same as in process_event_batch(), and
+    `workers` is the default offered at the worker-count prompt.
     """
     # -------------------------------------------------------------------
     # 1. GET INPUT CSV FILE PATH FROM THE USER
@@ -120,166 +832,86 @@ def process_event_list():
         return
 
     # -------------------------------------------------------------------
-    # 2. READ THE CSV FILE
+    # 2. DETECT COLUMNS AND LET THE USER CONFIRM OR OVERRIDE THEM
     # -------------------------------------------------------------------
-    processed_data = []
-    with open(input_file_path, "r", encoding="utf-8-sig") as infile:
-        reader = csv.DictReader(infile)
-        
-        # Possible columns we want to detect
-        possible_name_columns = ["Name", "Full Name", "Participant Name"]
-        possible_first_name_columns = ["First Name", "FName", "FirstName"]
-        possible_last_name_columns = ["Last Name", "LName", "LastName"]
-        possible_email_columns = ["Email", "E-mail", "Email Address"]
-        
-        # Variables to hold detected column names
-        detected_full_name_col = None
-        detected_first_name_col = None
-        detected_last_name_col = None
-        detected_email_col = None
-        
-        # Try to detect column names automatically
-        for col in reader.fieldnames:
-            clean_col = col.strip().lower()
-            if clean_col in [x.lower() for x in possible_name_columns]:
-                detected_full_name_col = col
-            if clean_col in [x.lower() for x in possible_first_name_columns]:
-                detected_first_name_col = col
-            if clean_col in [x.lower() for x in possible_last_name_columns]:
-                detected_last_name_col = col
-            if clean_col in [x.lower() for x in possible_email_columns]:
-                detected_email_col = col
-        
-        # Let the user confirm or override
-        if detected_full_name_col:
-            user_full_name_col = get_user_input(
-                f"Detected '{detected_full_name_col}' as the Full Name column. "
-                "Press Enter to confirm or type an alternative column name",
-                detected_full_name_col
-            )
-            detected_full_name_col = user_full_name_col
-        else:
-            detected_full_name_col = get_user_input(
-                "Could not detect a 'Full Name' column. "
-                "Enter the column name if you have one",
-                ""
-            )
-        
-        if detected_first_name_col:
-            user_first_name_col = get_user_input(
-                f"Detected '{detected_first_name_col}' as the First Name column. "
-                "Press Enter to confirm or type an alternative column name",
-                detected_first_name_col
-            )
-            detected_first_name_col = user_first_name_col
-        else:
-            detected_first_name_col = get_user_input(
-                "Could not detect a 'First Name' column. "
-                "Enter the column name if you have one",
-                ""
-            )
-        
-        if detected_last_name_col:
-            user_last_name_col = get_user_input(
-                f"Detected '{detected_last_name_col}' as the Last Name column. "
-                "Press Enter to confirm or type an alternative column name",
-                detected_last_name_col
-            )
-            detected_last_name_col = user_last_name_col
-        else:
-            detected_last_name_col = get_user_input(
-                "Could not detect a 'Last Name' column. "
-                "Enter the column name if you have one",
-                ""
-            )
-        
-        if detected_email_col:
-            user_email_col = get_user_input(
-                f"Detected '{detected_email_col}' as the Email column. "
-                "Press Enter to confirm or type an alternative column name",
-                detected_email_col
-            )
-            detected_email_col = user_email_col
-        else:
-            detected_email_col = get_user_input(
-                "Could not detect an 'Email' column. "
-                "Enter the column name if you have one",
-                ""
-            )
-        
-        # -------------------------------------------------------------------
-        # 3. PROCESS EACH ROW
-        # -------------------------------------------------------------------
-        for row in reader:
-            first_name = ""
-            last_name = ""
-            
-            # If we have a dedicated first name column
-            if detected_first_name_col and detected_first_name_col in row:
-                first_name = row[detected_first_name_col].strip()
-            
-            # If we have a dedicated last name column
-            if detected_last_name_col and detected_last_name_col in row:
-                last_name = row[detected_last_name_col].strip()
-            
-            # If first/last are still missing, try full name
-            if (not first_name or not last_name) and detected_full_name_col and detected_full_name_col in row:
-                name_string = row[detected_full_name_col]
-                split_first, split_last = split_name(name_string)
-                if not first_name:
-                    first_name = split_first
-                if not last_name:
-                    last_name = split_last
-            
-            # Extract and validate email
-            email = ""
-            if detected_email_col and detected_email_col in row:
-                email = row[detected_email_col].strip()
-            
-            email_valid = is_valid_email(email) if email else False
-            
-            processed_contact = {
-                "First Name": first_name,
-                "Last Name": last_name,
-                "Email": email,
-                "Email Valid?": "Yes" if email_valid else "No"
-            }
-            
-            # You can copy additional columns if you wish, for example:
-            # processed_contact["Company"] = row.get("Company", "").strip()
-            
-            processed_data.append(processed_contact)
-    
+    fieldnames = read_header(input_file_path)
+    profiles = load_profiles(profile_path)
+    profile = profiles.get(header_fingerprint(fieldnames))
+    # Start from the stored mapping for this header layout if we have one
+    detected = profile["columns"] if profile else detect_columns(fieldnames)
+    columns = confirm_columns(detected)
+
+    # Remember the confirmed mapping so batch mode can reuse it
+    remember_profile(profiles, fieldnames, columns, "confirmed")
+    save_profiles(profile_path, profiles)
+
     # -------------------------------------------------------------------
-    # 4. WRITE THE OUTPUT TO A NEW CSV
+    # 3. GET THE OUTPUT PATH (needed up front so rows can be streamed)
     # -------------------------------------------------------------------
     output_file_path = get_user_input(
         prompt="Enter the desired output CSV file name/path",
         default_value="processed_event_list.csv"
     )
-    
-    with open(output_file_path, "w", newline="", encoding="utf-8") as outfile:
-        # Determine fieldnames from the first record's keys
-        if processed_data:
-            fieldnames = list(processed_data[0].keys())
-        else:
-            fieldnames = ["First Name", "Last Name", "Email", "Email Valid?"]
-        
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for contact in processed_data:
-            writer.writerow(contact)
-    
+
+    workers = get_user_input(
+        prompt="Number of worker processes (1 = single process, use more for multi-GB files)",
+        default_value=str(workers)
+    )
+    try:
+        workers = max(int(workers), 1)
+    except ValueError:
+        print(f"Invalid worker count '{workers}', using 1.")
+        workers = 1
+
+    # -------------------------------------------------------------------
+    # 4. PROCESS EACH ROW AND STREAM IT TO THE OUTPUT CSV
+    # -------------------------------------------------------------------
+    dedup_index = DedupIndex(dedup_path) if dedup_path else None
+    try:
+        rows_written, preview = process_with_engine(
+            input_file_path, output_file_path, columns, workers, engine,
+            dedup_index=dedup_index, dedup_mode=dedup_mode
+        )
+        # Only remember these contacts once the output file is complete
+        if dedup_index:
+            dedup_index.commit()
+    finally:
+        if dedup_index:
+            dedup_index.close()
+
     # -------------------------------------------------------------------
     # 5. DISPLAY COMPLETION MESSAGE AND SAMPLE OUTPUT
     # -------------------------------------------------------------------
-    print(f"\nProcessing complete! Results saved to '{output_file_path}'.\n")
+    print(f"\nProcessing complete! {rows_written} rows saved to '{output_file_path}'.\n")
     print("Sample output (first 5 rows):")
-    for i, item in enumerate(processed_data[:5]):
+    for item in preview:
         print(item)
 
 # -----------------------------------------------------------------------
 # ENTRY POINT
 # -----------------------------------------------------------------------
 if __name__ == "__main__":
-    process_event_list()
+    parser = argparse.ArgumentParser(description="Format event list uploads for a CRM.")
+    parser.add_argument("--batch", metavar="INPUT_DIR",
+                        help="Process every CSV in INPUT_DIR without prompts")
+    parser.add_argument("--output-dir", help="Where batch outputs go (default: INPUT_DIR/processed)")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILE_PATH,
+                        help="Column-mapping profile store (JSON)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes per file (sharded mode when > 1)")
+    parser.add_argument("--concurrent-files", type=int, default=1,
+                        help="Number of files to process at the same time in batch mode")
+    parser.add_argument("--engine", choices=["python", "vectorized"], default="python",
+                        help="Row-by-row Python engine or the pandas/Arrow columnar engine")
+    parser.add_argument("--dedup-index", metavar="PATH",
+                        help="SQLite index of contacts from earlier runs (created if missing)")
+    parser.add_argument("--dedup-mode", choices=["mark", "drop"], default="mark",
+                        help="Mark previously processed contacts or drop them from the output")
+    args = parser.parse_args()
+
+    if args.batch:
+        process_event_batch(args.batch, args.output_dir, args.profiles,
+                            args.workers, args.concurrent_files, args.engine,
+                            args.dedup_index, args.dedup_mode)
+    else:
+        process_event_list(args.dedup_index, args.dedup_mode, args.profiles, args.engine, args.workers)
@@ -0,0 +1,90 @@
+import os
+
+# The extractor connects at import time; never let the tests reach the configured database
+os.environ.setdefault("CONFLUENCE_DB_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+import confluenceToDatabase as extractor
+
+LEGACY_CONTENT = """CREATE TABLE {name} (
+    id TEXT, type TEXT, title TEXT, version BIGINT, space TEXT, content TEXT,
+    attachments TEXT, comments TEXT, contributors TEXT, metadata TEXT
+)"""
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    """
+    A database as earlier versions of the script left it: content tables
+    without a key, last_modified or body_hash, holding one copy of each item
+    per run, and a users table with duplicate names.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'confluence.db'}")
+    monkeypatch.setattr(extractor, "DB_ENGINE", engine)
+    with engine.begin() as connection:
+        for content_type in extractor.CONTENT_TYPES:
+            connection.exec_driver_sql(LEGACY_CONTENT.format(name=f"confluence_{content_type}s"))
+        connection.exec_driver_sql(
+            "INSERT INTO confluence_pages (id, type, title, version, space, content) VALUES "
+            "('1', 'page', 'Old title', 1, 'SPACE1', '<p>first</p>'), "
+            "('1', 'page', 'New title', 2, 'SPACE1', '<p>second</p>'), "
+            "('1', 'page', 'New title', 2, 'SPACE1', '<p>second</p>'), "
+            "('2', 'page', 'Other', 1, 'SPACE1', '<p>other</p>')"
+        )
+        connection.exec_driver_sql("CREATE TABLE confluence_users (username TEXT, display_name TEXT)")
+        connection.exec_driver_sql(
+            "INSERT INTO confluence_users VALUES ('ann', 'Ann'), ('ann', 'Ann'), ('bob', 'Bob')"
+        )
+    yield engine
+    engine.dispose()
+
+def test_ensure_schema_migrates_legacy_tables(legacy_db):
+    extractor.ensure_schema()
+
+    columns = {col["name"] for col in inspect(legacy_db).get_columns("confluence_pages")}
+    assert {"last_modified", "body_hash"} <= columns
+    with legacy_db.connect() as connection:
+        pages = connection.exec_driver_sql(
+            "SELECT id, title, version, content, body_hash FROM confluence_pages ORDER BY id"
+        ).fetchall()
+        assert [(p.id, p.title, p.version, p.content) for p in pages] == [("1", "New title", 2, None), ("2", "Other", 1, None)]
+        assert extractor.read_body(connection, pages[0].body_hash) == "<p>second</p>"
+        versions = connection.exec_driver_sql(
+            "SELECT content_id, version, last_modified FROM confluence_page_versions ORDER BY content_id"
+        ).fetchall()
+        assert [tuple(v) for v in versions] == [("1", 2, None), ("2", 1, None)]
+        users = connection.exec_driver_sql("SELECT username FROM confluence_users ORDER BY username").fetchall()
+        assert [u.username for u in users] == ["ann", "bob"]
+
+    # Running it again changes nothing
+    extractor.ensure_schema()
+    with legacy_db.connect() as connection:
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM confluence_pages").scalar() == 2
+
+def test_migrate_bodies_without_last_modified(legacy_db):
+    # Only the new tables are created; the legacy page table keeps its shape
+    extractor.METADATA.create_all(legacy_db, tables=[extractor.BODIES, extractor.versions_table("page")])
+    extractor.migrate_bodies("page", batch_size=1)
+
+    with legacy_db.connect() as connection:
+        pages = connection.exec_driver_sql("SELECT content, body_hash FROM confluence_pages").fetchall()
+        assert all(p.content is None and p.body_hash for p in pages)
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM confluence_bodies").scalar() == 3
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM confluence_page_versions").scalar() == 3
+
+def test_upserts_after_migration(legacy_db):
+    extractor.ensure_schema()
+    item = {
+        "id": "1", "title": "Newest title", "version": {"number": 3, "when": "2024-06-10T09:12:44.000Z"},
+        "body": {"storage": {"value": "<p>third</p>"}},
+    }
+    writer = extractor.ContentWriter("page")
+    writer.write([extractor.normalize_item(item, "SPACE1", "page")])
+    extractor.save_users([{"username": "ann", "display_name": "Ann Smith"}])
+
+    with legacy_db.connect() as connection:
+        page = connection.exec_driver_sql("SELECT title, version FROM confluence_pages WHERE id = '1'").one()
+        assert tuple(page) == ("Newest title", 3)
+        users = connection.exec_driver_sql("SELECT display_name FROM confluence_users WHERE username = 'ann'").fetchall()
+        assert [u.display_name for u in users] == ["Ann Smith"]